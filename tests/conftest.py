@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,14 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_dirs(tmp_path_factory):
+    """Файловые кэши и метрики тестов — во временной папке,
+    как у core.runner.IsolatedDirsRunner для manage.py test.
+    """
+    from core.runner import isolated_dirs as isolated_settings
+
+    with isolated_settings(str(tmp_path_factory.mktemp('yatube'))):
+        yield
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import mail  # noqa: F401 — регистрирует задачу отправки
+        from .profiling import instrument_templates
+
+        instrument_templates()
+        autodiscover_modules('tasks')
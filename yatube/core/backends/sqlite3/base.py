@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+from core.sqlite import pragma_statements
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с PRAGMA из SQLITE_PRAGMAS и транзакциями BEGIN IMMEDIATE.
+
+    В режиме WAL транзакция, начатая обычным BEGIN, сначала читает,
+    а при первой записи может получить «database is locked» сразу,
+    минуя busy_timeout, если другой процесс успел записать. BEGIN
+    IMMEDIATE берёт блокировку записи в начале и ждёт её как положено.
+    """
+
+    def init_connection_state(self):
+        super().init_connection_state()
+        for statement in pragma_statements(settings.SQLITE_PRAGMAS):
+            self.connection.execute(statement)
+
+    def _start_transaction_under_autocommit(self):
+        if settings.SQLITE_IMMEDIATE_TRANSACTIONS:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,55 @@
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+WAIT_STEPS = 20
+EARLY_RECOMPUTE_BETA = 1.0
+STALE_FACTOR = 2
+
+
+def get_or_build(key, build, timeout):
+    """Значение из кэша с защитой от набега на пересборку.
+
+    Незадолго до истечения срока значение с растущей вероятностью
+    пересобирается заранее (probabilistic early expiration), а сборку
+    выполняет только процесс, взявший блокировку; остальные отдают
+    старое значение или ждут результата, а не дождавшись — собирают
+    сами, не трогая чужую блокировку. Блокировка — cache.add, поэтому
+    она надёжна, только если add атомарен в общем кэше (memcached,
+    Redis, core.cache_backends.LockedFileBasedCache).
+    """
+    lock_key = f'{key}:lock'
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires = entry
+        early = delta * EARLY_RECOMPUTE_BETA * math.log(1 - random.random())
+        if time.time() - early < expires:
+            return value
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not locked:
+            return value
+    else:
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not locked:
+            for _ in range(WAIT_STEPS):
+                time.sleep(WAIT_INTERVAL)
+                entry = cache.get(key)
+                if entry is not None:
+                    return entry[0]
+    try:
+        started = time.time()
+        value = build()
+        finished = time.time()
+        cache.set(
+            key,
+            (value, finished - started, finished + timeout),
+            timeout * STALE_FACTOR,
+        )
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+from . import profiling
+
+VERSION_SUFFIX = ':__version__'
+TIERS = ('local', 'shared')
+LOCK_STRIPES = 64
+
+_local_caches = {}
+_local_stats = {}
+_locks = {}
+_MISSING = object()
+
+
+def _new_token():
+    """Версия значения: число, чтобы incr мог сдвигать её атомарно."""
+    return uuid.uuid4().int >> 65
+
+
+class TwoTierCache(BaseCache):
+    """Двухуровневый кэш: LRU в памяти процесса перед общим бэкендом.
+
+    Рядом с каждым значением общий кэш хранит ключ версии — случайное
+    число. Локальная копия отдаётся, только если её версия совпадает
+    с версией в общем кэше, поэтому запись или удаление в одном процессе
+    сразу видны остальным, а крупные значения не читаются из общего кэша
+    повторно. Значение пишется раньше версии, а читается позже, так что
+    локальная копия не может оказаться старее своей версии. incr
+    атомарно увеличивает значение и версию средствами общего кэша.
+
+    Настройки в OPTIONS: SHARED_ALIAS — алиас общего кэша в CACHES,
+    LOCAL_MAX_ENTRIES — размер LRU в памяти процесса.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED_ALIAS', 'shared')
+        self._max_local = int(options.get('LOCAL_MAX_ENTRIES', 500))
+        self._local = _local_caches.setdefault(location, OrderedDict())
+        self._stats = _local_stats.setdefault(location, {
+            f'{tier}_{kind}': 0
+            for tier in TIERS
+            for kind in ('hits', 'misses')
+        })
+        self._lock = _locks.setdefault(location, threading.Lock())
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def stats(self):
+        """Попадания и промахи по уровням в текущем процессе."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, tier, hits, misses):
+        with self._lock:
+            self._stats[f'{tier}_hits'] += hits
+            self._stats[f'{tier}_misses'] += misses
+
+    def _local_get(self, key, version, token):
+        local_key = self.make_key(key, version)
+        with self._lock:
+            entry = self._local.get(local_key)
+            if entry is None or entry[0] != token:
+                return _MISSING
+            self._local.move_to_end(local_key)
+        return pickle.loads(entry[1])
+
+    def _local_set(self, key, version, token, value):
+        local_key = self.make_key(key, version)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[local_key] = (token, pickled)
+            self._local.move_to_end(local_key)
+            while len(self._local) > self._max_local:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, keys, version):
+        with self._lock:
+            for key in keys:
+                self._local.pop(self.make_key(key, version), None)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        tokens = self.shared.get_many(
+            [key + VERSION_SUFFIX for key in keys], version=version
+        )
+        found = {}
+        missing = []
+        for key in keys:
+            token = tokens.get(key + VERSION_SUFFIX)
+            value = _MISSING
+            if token is not None:
+                value = self._local_get(key, version, token)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        self._count('local', len(found), len(missing))
+        if missing:
+            shared_found = self.shared.get_many(missing, version=version)
+            for key, value in shared_found.items():
+                token = tokens.get(key + VERSION_SUFFIX)
+                if token is not None:
+                    self._local_set(key, version, token, value)
+                found[key] = value
+            self._count(
+                'shared', len(shared_found), len(missing) - len(shared_found)
+            )
+        profiling.record_cache(len(found), len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        shared_data = {}
+        for key, value in data.items():
+            token = _new_token()
+            shared_data[key] = value
+            shared_data[key + VERSION_SUFFIX] = token
+            self._local_set(key, version, token, value)
+        return self.shared.set_many(shared_data, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        token = _new_token()
+        if not self.shared.add(key, value, timeout, version):
+            return False
+        self.shared.set(key + VERSION_SUFFIX, token, timeout, version)
+        self._local_set(key, version, token, value)
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version)
+        try:
+            token = self.shared.incr(key + VERSION_SUFFIX, 1, version)
+        except ValueError:
+            # Версии нет — локальную копию не заводим до следующего set.
+            self._local_delete([key], version)
+        else:
+            self._local_set(key, version, token, value)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.touch(key + VERSION_SUFFIX, timeout, version)
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self._local_delete(keys, version)
+        self.shared.delete_many(
+            keys + [key + VERSION_SUFFIX for key in keys], version
+        )
+
+    def has_key(self, key, version=None):
+        return self.shared.has_key(key, version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+class LockedFileBasedCache(FileBasedCache):
+    """Файловый кэш с атомарными add и incr для нескольких процессов.
+
+    В FileBasedCache обе операции — чтение и запись подряд, и два
+    процесса могут насчитать одно и то же. Здесь они выполняются под
+    flock одного из LOCK_STRIPES файлов блокировки, как INCR в memcached
+    или Redis. incr сохраняет срок жизни ключа и не чистит кэш: новых
+    записей он не добавляет.
+    """
+
+    @contextmanager
+    def _key_lock(self, key, version):
+        self._createdir()
+        digest = hashlib.md5(self.make_key(key, version).encode()).digest()
+        path = os.path.join(self._dir, f'{digest[0] % LOCK_STRIPES}.lock')
+        with open(path, 'ab') as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock_file)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._key_lock(key, version):
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._key_lock(key, version):
+            try:
+                with open(self._key_to_file(key, version), 'rb') as f:
+                    if self._is_expired(f):
+                        raise ValueError(f"Key '{key}' not found")
+                    f.seek(0)
+                    expiry = pickle.load(f)
+                    value = pickle.loads(zlib.decompress(f.read()))
+            except FileNotFoundError:
+                raise ValueError(f"Key '{key}' not found")
+            value += delta
+            timeout = None if expiry is None else expiry - time.time()
+            fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            os.replace(tmp_path, self._key_to_file(key, version))
+            return value
@@ -0,0 +1,70 @@
+"""Чтение с реплики, запись в основную базу.
+
+ReplicaMiddleware включает реплику только для GET-запросов к view из
+REPLICA_VIEWS; все прочие чтения, а также чтения внутри транзакции
+идут в основную базу. Если реплика в DATABASES не настроена, роутер
+ничего не меняет.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = ContextVar('replica_state', default=None)
+
+
+class ReplicaState:
+    """Состояние текущего запроса: читать ли с реплики и была ли запись."""
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+def replica_configured():
+    return settings.REPLICA_DATABASE in connections.databases
+
+
+def current_state():
+    return _state.get()
+
+
+def activate(state):
+    return _state.set(state)
+
+
+def deactivate(token):
+    _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not replica_configured():
+            return None
+        state = _state.get()
+        if (
+            state is None
+            or not state.use_replica
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return settings.REPLICA_DATABASE
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        if not replica_configured():
+            return None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == settings.REPLICA_DATABASE:
+            return False
+        return None
@@ -0,0 +1,31 @@
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def conditional(get_validators):
+    """Условный GET по паре (etag, last_modified) из get_validators.
+
+    get_validators(request, *args, **kwargs) вызывается до view один
+    раз; если клиент уже получил эту версию, view не вызывается и
+    отдаётся 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            etag, last_modified = get_validators(request, *args, **kwargs)
+            etag = quote_etag(etag)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.setdefault('ETag', etag)
+                response.setdefault('Last-Modified', http_date(last_modified))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,97 @@
+import base64
+import json
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .tasks import task
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_attachment(attachment):
+    """Вложение (имя, содержимое, тип) в виде, пригодном для JSON.
+
+    Готовые MIME-части так не сохранить — для них TypeError.
+    """
+    if not isinstance(attachment, (list, tuple)):
+        raise TypeError('MIME-вложение нельзя поставить в очередь')
+    filename, content, mimetype = attachment
+    if isinstance(content, bytes):
+        return {
+            'filename': filename,
+            'content': base64.b64encode(content).decode('ascii'),
+            'mimetype': mimetype,
+            'base64': True,
+        }
+    return {
+        'filename': filename, 'content': content, 'mimetype': mimetype,
+        'base64': False,
+    }
+
+
+def serialize_message(message):
+    """Письмо в виде словаря для задачи send_email; TypeError, если
+    его нельзя сохранить в JSON.
+    """
+    data = {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': [
+            serialize_attachment(attachment)
+            for attachment in message.attachments
+        ],
+    }
+    json.dumps(data)
+    return data
+
+
+@task(priority=10)
+def send_email(message):
+    """Отправляет письмо через TASK_EMAIL_BACKEND."""
+    attachments = message.pop('attachments', [])
+    email = EmailMultiAlternatives(
+        connection=get_connection(settings.TASK_EMAIL_BACKEND),
+        **message,
+    )
+    for attachment in attachments:
+        content = attachment['content']
+        if attachment['base64']:
+            content = base64.b64decode(content)
+        email.attach(attachment['filename'], content, attachment['mimetype'])
+    return email.send()
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Ставит письма в очередь задач вместо отправки в запросе.
+
+    Письма, которые нельзя сохранить в JSON (например, с готовыми
+    MIME-вложениями), отправляются сразу через TASK_EMAIL_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        sent = 0
+        for message in email_messages:
+            try:
+                data = serialize_message(message)
+            except TypeError:
+                logger.warning(
+                    'Письмо «%s» отправлено без очереди', message.subject
+                )
+                sent += get_connection(
+                    settings.TASK_EMAIL_BACKEND,
+                    fail_silently=self.fail_silently,
+                ).send_messages([message]) or 0
+                continue
+            send_email.delay(data)
+            sent += 1
+        return sent
@@ -0,0 +1,35 @@
+import copy
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core.ratelimit import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер собственной цены ограничения частоты запросов '
+        'на бэкенде кэша RATELIMIT_CACHE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=1000,
+            help='Сколько раз вызвать лимитер в каждом режиме.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть больше нуля')
+        with tempfile.TemporaryDirectory() as cache_dir:
+            caches = copy.deepcopy(settings.CACHES)
+            caches[settings.RATELIMIT_CACHE]['LOCATION'] = cache_dir
+            with override_settings(CACHES=caches):
+                timings = benchmark(options['requests'])
+        for mode, result in timings.items():
+            self.stdout.write(
+                f'{mode}: в среднем {result["mean_us"]:.0f} мкс, '
+                f'p95 {result["p95_us"]:.0f} мкс на запрос'
+            )
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from core.db_router import replica_configured
+from core.replication import replicate
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплику; с --interval '
+        'повторяет копирование, изображая отстающую реплику.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Пауза между копиями в секундах; 0 — скопировать один раз.'
+        )
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError(
+                'Реплика не настроена: задайте DATABASE_REPLICA_NAME'
+            )
+        while True:
+            started = time.perf_counter()
+            replicate(DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE)
+            self.stdout.write(
+                f'Реплика обновлена за '
+                f'{(time.perf_counter() - started) * 1000:.0f} мс'
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,118 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import metrics, tasks
+from core.models import Task
+
+
+def work_loop(batch_size, poll_interval, once, stop):
+    """Цикл воркера: забирает порции задач, пока не попросят остановиться.
+
+    С once выходит, как только очередь опустела. Метрики задач (время
+    превью и т. п.) после каждой порции пишутся в METRICS_DIR, чтобы
+    их видел /metrics.
+    """
+    worker = tasks.worker_id()
+    done = 0
+    try:
+        while not stop.is_set():
+            claimed = tasks.work(worker, batch_size)
+            done += claimed
+            metrics.flush()
+            if not claimed:
+                if once:
+                    break
+                stop.wait(poll_interval)
+    finally:
+        metrics.flush(force=True)
+    return done
+
+
+def _process_main(batch_size, poll_interval, once, stop, results):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    connections.close_all()
+    done = 0
+    try:
+        done = work_loop(batch_size, poll_interval, once, stop)
+    finally:
+        results.put(done)
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди core.tasks в нескольких процессах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=2,
+            help='Число процессов-воркеров; 0 — работать в текущем.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=10,
+            help='Сколько задач воркер забирает за раз.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] < 0 or options['batch_size'] < 1:
+            raise CommandError(
+                '--processes не может быть меньше нуля, '
+                '--batch-size — меньше единицы'
+            )
+        started = time.perf_counter()
+        if options['processes']:
+            done = self.run_processes(options)
+        else:
+            done = work_loop(
+                options['batch_size'], options['poll_interval'],
+                options['once'], threading.Event(),
+            )
+        elapsed = time.perf_counter() - started
+        failed = Task.objects.filter(status=Task.FAILED).count()
+        self.stdout.write(
+            f'Выполнено задач: {done} за {elapsed:.1f} с, '
+            f'с ошибкой всего: {failed}'
+        )
+
+    def run_processes(self, options):
+        """Запускает воркеры; SIGTERM и Ctrl+C дают им доделать порцию."""
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        results = context.Queue()
+        connections.close_all()
+        processes = [
+            context.Process(target=_process_main, args=(
+                options['batch_size'], options['poll_interval'],
+                options['once'], stop, results,
+            ))
+            for _ in range(options['processes'])
+        ]
+        previous = signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        try:
+            for process in processes:
+                process.start()
+            done = 0
+            for process in processes:
+                while True:
+                    try:
+                        done += results.get()
+                        break
+                    except KeyboardInterrupt:
+                        stop.set()
+            for process in processes:
+                process.join()
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        return done
@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.sqlite import create_stress_db, stress
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест SQLite: параллельные процессы-писатели '
+        'и читатели на временной базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument(
+            '--seconds', type=float, default=5.0,
+            help='Сколько секунд работает каждый процесс.'
+        )
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='Сначала прогнать тест с настройками SQLite по умолчанию.'
+        )
+
+    def handle(self, *args, **options):
+        if options['writers'] < 0 or options['readers'] < 0:
+            raise CommandError('Число процессов не может быть отрицательным')
+        modes = [False, True] if options['compare'] else [True]
+        failed = False
+        for tuned in modes:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'stress.sqlite3')
+                create_stress_db(path)
+                totals = stress(
+                    path, options['writers'], options['readers'],
+                    options['seconds'], tuned,
+                )
+            title = 'с настройкой' if tuned else 'по умолчанию'
+            for role, result in totals.items():
+                self.stdout.write(
+                    f'{title}: {role} {result["ops_per_second"]:.0f} оп/с, '
+                    f'ошибок «database is locked»: {result["errors"]}'
+                )
+            if tuned and any(result['errors'] for result in totals.values()):
+                failed = True
+        if failed:
+            raise CommandError('База блокировалась при настроенном SQLite')
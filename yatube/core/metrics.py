@@ -0,0 +1,257 @@
+"""Метрики в текстовом формате Prometheus.
+
+Каждый процесс копит счётчики и гистограммы в памяти и не чаще раза
+в METRICS_FLUSH_INTERVAL секунд сбрасывает их в свой файл
+METRICS_DIR/<pid>-<метка запуска>.json. Страница метрик складывает
+файлы всех процессов, поэтому сервер с несколькими воркерами отдаёт
+общие цифры. Файлы завершившихся процессов при этом удаляются, а метка
+запуска не даёт новому процессу с тем же pid затереть чужой файл.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+DESCRIPTIONS = {
+    'yatube_requests_total': ('counter', 'Число ответов по view и статусу.'),
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа по view.'
+    ),
+    'yatube_db_queries_total': ('counter', 'Число SQL-запросов по view.'),
+    'yatube_cache_hits_total': ('counter', 'Попадания в кэш по уровням.'),
+    'yatube_cache_misses_total': ('counter', 'Промахи кэша по уровням.'),
+    'yatube_cache_hit_ratio': ('gauge', 'Доля попаданий в кэш.'),
+    'yatube_thumbnail_seconds': ('histogram', 'Время подготовки превью.'),
+    'yatube_paginator_seconds': (
+        'histogram', 'Время выборки страницы пагинатором.'
+    ),
+    'yatube_ratelimited_total': (
+        'counter', 'Запросы, отклонённые ограничением частоты.'
+    ),
+}
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_histograms = {}
+_last_flush = 0.0
+_file_name = None
+_file_pid = None
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def observe(name, value, **labels):
+    """Добавляет значение в гистограмму с границами METRICS_BUCKETS.
+
+    Корзины хранятся накопительно, как их отдаёт Prometheus.
+    """
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                'buckets': dict.fromkeys(settings.METRICS_BUCKETS, 0),
+                'sum': 0.0,
+                'count': 0,
+            }
+        for bound in histogram['buckets']:
+            if value <= bound:
+                histogram['buckets'][bound] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def _cache_counters():
+    """Попадания и промахи кэшей, которые их считают (TwoTierCache)."""
+    counters = {}
+    for alias in settings.CACHES:
+        stats = getattr(caches[alias], 'stats', None)
+        if stats is None:
+            continue
+        for name, value in stats().items():
+            tier, kind = name.split('_')
+            counters[_key(
+                f'yatube_cache_{kind}_total', {'cache': alias, 'tier': tier}
+            )] = value
+    return counters
+
+
+def snapshot():
+    """Цифры текущего процесса в виде, пригодном для JSON."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = [
+            [name, dict(labels), {
+                'buckets': [
+                    [bound, count]
+                    for bound, count in histogram['buckets'].items()
+                ],
+                'sum': histogram['sum'],
+                'count': histogram['count'],
+            }]
+            for (name, labels), histogram in _histograms.items()
+        ]
+    counters.update(_cache_counters())
+    return {
+        'counters': [
+            [name, dict(labels), value]
+            for (name, labels), value in counters.items()
+        ],
+        'histograms': histograms,
+    }
+
+
+def _own_file():
+    """Файл текущего процесса; после fork у потомка он свой."""
+    global _file_name, _file_pid
+    pid = os.getpid()
+    if _file_pid != pid:
+        _file_pid = pid
+        _file_name = f'{pid}-{uuid.uuid4().hex[:8]}.json'
+    return os.path.join(settings.METRICS_DIR, _file_name)
+
+
+def _alive(file_name):
+    """Жив ли процесс, записавший файл метрик."""
+    try:
+        pid = int(file_name[:-len('.json')].split('-')[0])
+        os.kill(pid, 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def flush(force=False):
+    """Пишет цифры процесса в его файл, не чаще METRICS_FLUSH_INTERVAL."""
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush = now
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(
+        dir=settings.METRICS_DIR, suffix='.tmp'
+    )
+    with os.fdopen(descriptor, 'w') as stream:
+        json.dump(snapshot(), stream)
+    os.replace(temp_path, _own_file())
+
+
+def _process_files():
+    """Цифры живых процессов из METRICS_DIR; файлы завершившихся
+    процессов удаляются.
+    """
+    for file_name in sorted(os.listdir(settings.METRICS_DIR)):
+        if not file_name.endswith('.json'):
+            continue
+        path = os.path.join(settings.METRICS_DIR, file_name)
+        try:
+            if not _alive(file_name):
+                os.remove(path)
+                continue
+            with open(path) as stream:
+                yield json.load(stream)
+        except (OSError, ValueError):
+            continue
+
+
+def collect():
+    """Сумма цифр всех живых процессов из METRICS_DIR."""
+    flush(force=True)
+    counters = defaultdict(float)
+    histograms = {}
+    for data in _process_files():
+        for name, labels, value in data['counters']:
+            counters[_key(name, labels)] += value
+        for name, labels, values in data['histograms']:
+            histogram = histograms.setdefault(_key(name, labels), {
+                'buckets': defaultdict(int), 'sum': 0.0, 'count': 0,
+            })
+            for bound, count in values['buckets']:
+                histogram['buckets'][bound] += count
+            histogram['sum'] += values['sum']
+            histogram['count'] += values['count']
+    return counters, histograms
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    text = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'),
+        )
+        for name, value in pairs
+    )
+    return '{' + text + '}'
+
+
+def _number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _hit_ratios(counters):
+    ratios = {}
+    for (name, labels), hits in counters.items():
+        if name != 'yatube_cache_hits_total':
+            continue
+        misses = counters.get(_key('yatube_cache_misses_total', dict(labels)))
+        total = hits + (misses or 0)
+        if total:
+            ratios[('yatube_cache_hit_ratio', labels)] = hits / total
+    return ratios
+
+
+def render():
+    """Текст страницы метрик в формате Prometheus 0.0.4."""
+    counters, histograms = collect()
+    values = dict(counters)
+    values.update(_hit_ratios(counters))
+    families = defaultdict(list)
+    for (name, labels), value in sorted(values.items()):
+        families[name].append(f'{name}{_labels(labels)} {_number(value)}')
+    for (name, labels), histogram in sorted(histograms.items()):
+        lines = families[name]
+        for bound, count in sorted(histogram['buckets'].items()):
+            lines.append(
+                f'{name}_bucket{_labels(labels, le=_number(bound))} {count}'
+            )
+        lines.append(
+            f'{name}_bucket{_labels(labels, le="+Inf")} {histogram["count"]}'
+        )
+        lines.append(
+            f'{name}_sum{_labels(labels)} {_number(histogram["sum"])}'
+        )
+        lines.append(f'{name}_count{_labels(labels)} {histogram["count"]}')
+    output = []
+    for name in sorted(families):
+        kind, description = DESCRIPTIONS.get(name, ('untyped', name))
+        output.append(f'# HELP {name} {description}')
+        output.append(f'# TYPE {name} {kind}')
+        output.extend(families[name])
+    return '\n'.join(output) + '\n'
+
+
+def reset():
+    """Забывает цифры текущего процесса; для тестов."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
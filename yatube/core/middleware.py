@@ -0,0 +1,201 @@
+import cProfile
+import os
+import random
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from . import db_router, metrics, profiling, ratelimit
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+REPLICA_PIN_KEY = 'replica_pin:{}'
+SAFE_METHODS = ('GET', 'HEAD')
+CPROFILE_VALUE = 'cprofile'
+
+
+class ProfilingMiddleware:
+    """Замеряет запрос и отдаёт цифры в заголовке Server-Timing.
+
+    Включается настройкой PROFILING_ENABLED для всех запросов или
+    заголовком X-Profile для отдельного запроса — в режиме DEBUG или
+    от сотрудника. Замеры попадают в кольцевой буфер profiling.recent().
+    Запросы с X-Profile: cprofile и доля PROFILING_SAMPLE_RATE
+    остальных замеряются ещё и cProfile, результат пишется
+    в PROFILING_DUMP_DIR.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.is_enabled(request):
+            return self.get_response(request)
+        profile = profiling.RequestProfile(request.method, request.path)
+        profiler = cProfile.Profile() if self.is_sampled(request) else None
+        token = profiling.activate(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.execute)
+                    )
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            profiling.deactivate(token)
+        profile.finish(response.status_code)
+        if profiler is not None:
+            profile.profile_path = self.dump(profiler, request)
+        profiling.remember(profile)
+        response['Server-Timing'] = profile.server_timing()
+        return response
+
+    def is_enabled(self, request):
+        if settings.PROFILING_ENABLED:
+            return True
+        if PROFILE_HEADER not in request.META:
+            return False
+        user = getattr(request, 'user', None)
+        return settings.DEBUG or bool(user and user.is_staff)
+
+    def is_sampled(self, request):
+        if request.META.get(PROFILE_HEADER, '').lower() == CPROFILE_VALUE:
+            return True
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def dump(self, profiler, request):
+        """Сохраняет статистику cProfile; имя — время и путь запроса."""
+        os.makedirs(settings.PROFILING_DUMP_DIR, exist_ok=True)
+        slug = re.sub(r'[^\w-]+', '_', request.path).strip('_') or 'index'
+        path = os.path.join(
+            settings.PROFILING_DUMP_DIR,
+            f'{time.time():.6f}-{request.method}-{slug[:80]}.prof',
+        )
+        profiler.dump_stats(path)
+        return path
+
+
+class MetricsMiddleware:
+    """Считает время ответа и SQL-запросы по именам view.
+
+    Учитываются только view из пространств имён METRICS_NAMESPACES;
+    цифры копятся в core.metrics и видны на странице метрик.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(None)
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        if match and match.namespace in settings.METRICS_NAMESPACES:
+            view = match.view_name
+            metrics.observe(
+                'yatube_request_duration_seconds', duration, view=view
+            )
+            metrics.inc('yatube_db_queries_total', len(queries), view=view)
+            metrics.inc(
+                'yatube_requests_total', view=view,
+                status=response.status_code,
+            )
+            metrics.flush()
+        return response
+
+
+class RateLimitMiddleware:
+    """Ограничивает частоту запросов к view из RATELIMITS.
+
+    Настройка сопоставляет имени view пару (лимит, методы); запросы
+    другими методами не считаются. Сверх лимита отдаётся 429.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.RATELIMIT_ENABLED:
+            return None
+        view_name = request.resolver_match.view_name
+        if view_name not in settings.RATELIMITS:
+            return None
+        rate, methods = settings.RATELIMITS[view_name]
+        if request.method not in methods:
+            return None
+        return ratelimit.limit_request(request, view_name, rate)
+
+
+class ReplicaMiddleware:
+    """Направляет чтения GET-страниц из REPLICA_VIEWS на реплику.
+
+    После запроса, который что-то записал, пользователь на
+    REPLICA_PIN_SECONDS закрепляется за основной базой, чтобы видеть
+    свои изменения до того, как они дойдут до реплики. Метка хранится
+    в кэше по id пользователя и в cookie — для анонимных запросов
+    и сразу после входа.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = db_router.ReplicaState()
+        token = db_router.activate(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router.deactivate(token)
+        if state.wrote:
+            self.pin(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = db_router.current_state()
+        state.use_replica = (
+            db_router.replica_configured()
+            and request.method in SAFE_METHODS
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+            and not self.is_pinned(request)
+        )
+
+    def is_pinned(self, request):
+        if settings.REPLICA_PIN_COOKIE in request.COOKIES:
+            return True
+        user = request.user
+        return user.is_authenticated and bool(
+            cache.get(REPLICA_PIN_KEY.format(user.pk))
+        )
+
+    def pin(self, request, response):
+        seconds = settings.REPLICA_PIN_SECONDS
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(REPLICA_PIN_KEY.format(user.pk), True, seconds)
+        response.set_cookie(
+            settings.REPLICA_PIN_COOKIE, '1', max_age=seconds, httponly=True,
+            samesite='Lax',
+        )
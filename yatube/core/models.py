@@ -10,3 +10,89 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class CountersModel(models.Model):
+    """Абстрактная модель с полями-счётчиками.
+
+    Счётчики меняются только атомарными UPDATE, поэтому при сохранении
+    существующей записи поля из counter_fields не перезаписываются.
+    """
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(
+        self, force_insert=False, force_update=False, using=None,
+        update_fields=None
+    ):
+        if update_fields is None and not force_insert and (
+            not self._state.adding
+        ):
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
+
+class Task(models.Model):
+    """Отложенная задача очереди core.tasks.
+
+    Задачи берут процессы run_workers: сначала с большим priority,
+    затем с более ранним run_at. Пока задача ждёт или выполняется,
+    второй такой же dedup_key поставить нельзя.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+    ACTIVE = (QUEUED, RUNNING)
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы в JSON', default='{}')
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    dedup_key = models.CharField(
+        'Ключ дедупликации', max_length=200, null=True, blank=True
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=5
+    )
+    run_at = models.DateTimeField('Выполнить не раньше')
+    locked_by = models.CharField('Исполнитель', max_length=100, blank=True)
+    locked_until = models.DateTimeField('Аренда до', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='task_claim_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status__in=('queued', 'running')),
+                name='unique active dedup key',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} [{self.status}]'
@@ -0,0 +1,148 @@
+"""Замеры одного запроса: время, SQL, шаблоны и кэш.
+
+Замер текущего запроса лежит в contextvar, поэтому код глубоко внутри
+(обёртка курсора, рендер шаблона, кэш) дописывает в него свои цифры,
+не зная о middleware. Если замер не включён, запись ничего не делает.
+"""
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+
+from django.conf import settings
+
+_current = ContextVar('request_profile', default=None)
+_log = deque()
+_log_lock = Lock()
+
+
+class RequestProfile:
+    """Цифры одного запроса; время в миллисекундах."""
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.total_ms = 0.0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.status = None
+        self.profile_path = None
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - started) * 1000
+
+    def finish(self, status):
+        self.status = status
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing."""
+        return ', '.join((
+            f'total;dur={self.total_ms:.1f}',
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'cache;desc="hits={self.cache_hits} '
+            f'misses={self.cache_misses}"',
+        ))
+
+    def as_dict(self):
+        return {
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'total_ms': round(self.total_ms, 3),
+            'queries': self.queries,
+            'db_ms': round(self.db_ms, 3),
+            'template_ms': round(self.template_ms, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'profile': self.profile_path,
+        }
+
+
+def current():
+    return _current.get()
+
+
+def activate(profile):
+    return _current.set(profile)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def record_cache(hits, misses):
+    profile = _current.get()
+    if profile is not None:
+        profile.cache_hits += hits
+        profile.cache_misses += misses
+
+
+def record_template(duration_ms):
+    profile = _current.get()
+    if profile is not None:
+        profile.template_ms += duration_ms
+
+
+def remember(profile):
+    """Кладёт замер в кольцевой буфер на PROFILING_LOG_SIZE записей."""
+    global _log
+    with _log_lock:
+        if _log.maxlen != settings.PROFILING_LOG_SIZE:
+            _log = deque(_log, maxlen=settings.PROFILING_LOG_SIZE)
+        _log.append(profile.as_dict())
+
+
+def recent():
+    """Последние замеры, старые первыми."""
+    with _log_lock:
+        return list(_log)
+
+
+def clear():
+    with _log_lock:
+        _log.clear()
+
+
+def instrument_templates():
+    """Оборачивает рендер шаблонов Django замером времени.
+
+    Оборачивается только шаблон верхнего уровня, поэтому include
+    и наследование не считаются дважды. Вложенный render_to_string
+    (карточки внутри страницы) тоже проходит через эту обёртку, поэтому
+    время пишется только для внешнего рендера.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'profiled', False):
+        return
+    render = Template.render
+
+    @wraps(render)
+    def profiled_render(self, *args, **kwargs):
+        profile = _current.get()
+        if profile is None or profile.template_depth:
+            return render(self, *args, **kwargs)
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.template_depth -= 1
+            record_template((time.perf_counter() - started) * 1000)
+
+    profiled_render.profiled = True
+    Template.render = profiled_render
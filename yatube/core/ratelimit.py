@@ -0,0 +1,130 @@
+"""Ограничение частоты запросов к пишущим страницам.
+
+Лимит вида «10/m» считается скользящим окном: счётчики текущего
+и прошлого окна лежат в кэше RATELIMIT_CACHE, а прошлое окно входит
+в сумму с весом, убывающим по мере хода текущего. Кэш меняется только
+через add и incr, которые атомарны в memcached и Redis, а локально —
+в core.cache_backends.LockedFileBasedCache, поэтому процессы сервера
+делят одни счётчики. Отклонённые запросы тоже считаются: клиент,
+который продолжает слать запросы, так и остаётся за лимитом.
+
+Ключ — пользователь, а для анонимных запросов — IP-адрес. View
+ограничиваются настройкой RATELIMITS через RateLimitMiddleware или
+декоратором ratelimit.
+"""
+import math
+import statistics
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+from . import metrics
+
+UNITS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """«10/m» → (10, 60): число запросов и длина окна в секундах."""
+    try:
+        limit, unit = rate.split('/')
+        return int(limit), UNITS[unit]
+    except (KeyError, ValueError):
+        raise ValueError(f'Недопустимый лимит {rate!r}') from None
+
+
+def client_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def _increment(cache, key, timeout):
+    """Атомарно увеличивает счётчик окна, создавая его при нужде."""
+    for _ in range(2):
+        if cache.add(key, 1, timeout):
+            return 1
+        try:
+            return cache.incr(key)
+        except ValueError:
+            continue
+    return 1
+
+
+def hit(scope, ident, rate, now=None):
+    """Учитывает запрос; возвращает 0 или через сколько секунд
+    повторить, если лимит превышен.
+    """
+    limit, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now / period, 1)
+    prefix = f'ratelimit:{scope}:{ident}'
+    cache = caches[settings.RATELIMIT_CACHE]
+    current = _increment(cache, f'{prefix}:{window:.0f}', period * 2)
+    previous = cache.get(f'{prefix}:{window - 1:.0f}', 0)
+    if previous * (1 - elapsed) + current <= limit:
+        return 0
+    if previous and current < limit:
+        wait = 1 - (limit - current) / previous - elapsed
+    else:
+        wait = 1 - elapsed
+    return max(1, math.ceil(wait * period))
+
+
+def limit_request(request, scope, rate):
+    """Ответ 429 с Retry-After, если запрос превышает лимит, иначе None."""
+    retry_after = hit(scope, client_key(request), rate)
+    if not retry_after:
+        return None
+    metrics.inc('yatube_ratelimited_total', view=scope)
+    response = render(
+        request, 'core/429.html', {'retry_after': retry_after}, status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(rate, methods=('POST',), scope=None):
+    """Декоратор view: не больше rate запросов методами methods."""
+    def decorator(view):
+        view_scope = scope or f'{view.__module__}.{view.__name__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLED and request.method in methods:
+                response = limit_request(request, view_scope, rate)
+                if response is not None:
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def benchmark(requests=1000):
+    """Собственная цена лимитера: микросекунды на запрос.
+
+    new — каждый вызов hit() от нового клиента (счётчик создаётся
+    через add), repeat — от одного и того же (incr). Лимит выше числа
+    вызовов, так что замеряется обычный путь без отказа.
+    """
+    rate = f'{requests + 1}/m'
+    run = uuid.uuid4().hex
+    timings = {}
+    for name, ident in (('new', run + ':{}'), ('repeat', run)):
+        durations = []
+        for number in range(requests):
+            started = time.perf_counter()
+            hit('benchmark', ident.format(number), rate)
+            durations.append((time.perf_counter() - started) * 1e6)
+        durations.sort()
+        timings[name] = {
+            'mean_us': statistics.mean(durations),
+            'p95_us': durations[min(
+                len(durations) - 1, int(len(durations) * 0.95)
+            )],
+        }
+    return timings
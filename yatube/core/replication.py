@@ -0,0 +1,16 @@
+"""Замена репликации для двух локальных файлов SQLite.
+
+Реплика целиком перезаписывается копией основной базы через backup API
+SQLite. Между вызовами replicate() реплика отстаёт, как настоящая.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def replicate(source=DEFAULT_DB_ALIAS, target=None):
+    """Копирует базу source в target."""
+    source = connections[source]
+    target = connections[target or settings.REPLICA_DATABASE]
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
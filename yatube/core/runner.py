@@ -0,0 +1,46 @@
+import copy
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def isolated_dirs(work_dir):
+    """override_settings, переносящий файловые кэши, метрики, медиа
+    и прочие рабочие каталоги в work_dir.
+
+    Иначе тесты писали бы в каталоги запущенного рядом сервера,
+    а cache.clear() стирал бы его кэш и счётчики ограничения частоты.
+    Используется и этим раннером, и tests/conftest.py для pytest.
+    """
+    caches = copy.deepcopy(settings.CACHES)
+    for alias, config in caches.items():
+        if config['BACKEND'].endswith('FileBasedCache'):
+            config['LOCATION'] = os.path.join(work_dir, 'cache', alias)
+    return override_settings(
+        CACHES=caches,
+        MEDIA_ROOT=os.path.join(work_dir, 'media'),
+        METRICS_DIR=os.path.join(work_dir, 'metrics'),
+        PROFILING_DUMP_DIR=os.path.join(work_dir, 'profiles'),
+        EMAIL_FILE_PATH=os.path.join(work_dir, 'sent_emails'),
+    )
+
+
+class IsolatedDirsRunner(DiscoverRunner):
+    """Запускает тесты с рабочими каталогами во временной папке
+    (см. isolated_dirs).
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.work_dir = tempfile.mkdtemp(prefix='yatube-tests-')
+        self.isolated_settings = isolated_dirs(self.work_dir)
+        self.isolated_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolated_settings.disable()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
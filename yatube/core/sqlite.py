@@ -0,0 +1,139 @@
+"""Настройка SQLite для нескольких процессов-писателей.
+
+Бэкенд core.backends.sqlite3 выполняет при открытии соединения PRAGMA
+из SQLITE_PRAGMAS: журнал WAL не даёт писателям блокировать читателей,
+а busy_timeout заставляет ждать освобождения базы вместо ошибки
+«database is locked». Здесь же нагрузочный тест stress().
+"""
+import multiprocessing
+import re
+import sqlite3
+import time
+
+import django
+from django.apps import apps
+from django.db import OperationalError, connections, transaction
+from django.test.utils import override_settings
+
+NAME_RE = re.compile(r'^[a-z_]+$')
+VALUE_RE = re.compile(r'^(-?\d+|[A-Za-z]+)$')
+
+
+def pragma_statements(pragmas):
+    """PRAGMA в порядке применения; busy_timeout идёт первым, чтобы
+    переключение журнала тоже ждало занятую базу.
+    """
+    names = sorted(pragmas, key=lambda name: name != 'busy_timeout')
+    statements = []
+    for name in names:
+        value = str(pragmas[name])
+        if not NAME_RE.match(name) or not VALUE_RE.match(value):
+            raise ValueError(f'Недопустимая настройка PRAGMA {name}={value}')
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+STRESS_TABLE = 'stress_item'
+
+
+def create_stress_db(path):
+    """Пустая база с одной таблицей для нагрузочного теста."""
+    with sqlite3.connect(path) as db:
+        db.execute(
+            f'CREATE TABLE {STRESS_TABLE} ('
+            'id INTEGER PRIMARY KEY, worker INTEGER, value INTEGER, '
+            'payload TEXT)'
+        )
+        db.execute(
+            f'CREATE INDEX {STRESS_TABLE}_worker ON {STRESS_TABLE} (worker)'
+        )
+    db.close()
+
+
+def _write(cursor, worker):
+    with transaction.atomic():
+        cursor.execute(
+            f'SELECT COALESCE(MAX(value), 0) FROM {STRESS_TABLE} '
+            'WHERE worker = %s',
+            [worker],
+        )
+        value = cursor.fetchone()[0] + 1
+        cursor.execute(
+            f'INSERT INTO {STRESS_TABLE} (worker, value, payload) '
+            'VALUES (%s, %s, %s)',
+            [worker, value, 'x' * 200],
+        )
+
+
+def _read(cursor, worker):
+    cursor.execute(f'SELECT COUNT(*) FROM {STRESS_TABLE}')
+    cursor.fetchone()
+    cursor.execute(
+        f'SELECT id, payload FROM {STRESS_TABLE} ORDER BY id DESC LIMIT 10'
+    )
+    cursor.fetchall()
+
+
+def _stress_worker(path, tuned, role, worker, seconds, results):
+    """Процесс теста: пишет или читает через соединение Django.
+
+    Без tuned соединение работает с настройками SQLite по умолчанию.
+    """
+    if not apps.ready:
+        django.setup()
+    if not tuned:
+        override_settings(
+            SQLITE_PRAGMAS={}, SQLITE_IMMEDIATE_TRANSACTIONS=False
+        ).enable()
+    connection = connections['default'].copy()
+    connection.settings_dict['NAME'] = path
+    connections['default'] = connection
+    operation = _write if role == 'writer' else _read
+    done = errors = 0
+    deadline = time.monotonic() + seconds
+    with connection.cursor() as cursor:
+        while time.monotonic() < deadline:
+            try:
+                operation(cursor, worker)
+            except OperationalError as error:
+                if 'locked' not in str(error):
+                    raise
+                errors += 1
+            else:
+                done += 1
+    connection.close()
+    results.put((role, done, errors))
+
+
+def stress(path, writers=4, readers=4, seconds=5.0, tuned=True):
+    """Параллельные писатели и читатели в отдельных процессах.
+
+    Возвращает операции в секунду и число ошибок «database is locked»
+    по ролям. Базу надо создать заранее через create_stress_db(): WAL
+    сохраняется в файле, поэтому для сравнения с tuned=False нужна
+    отдельная база.
+    """
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=_stress_worker,
+            args=(path, tuned, role, worker, seconds, results),
+        )
+        for worker, role in enumerate(
+            ['writer'] * writers + ['reader'] * readers
+        )
+    ]
+    for process in processes:
+        process.start()
+    totals = {
+        role: {'ops_per_second': 0.0, 'errors': 0}
+        for role in ('writer', 'reader')
+    }
+    for _ in processes:
+        role, done, errors = results.get()
+        totals[role]['ops_per_second'] += done / seconds
+        totals[role]['errors'] += errors
+    for process in processes:
+        process.join()
+    return totals
@@ -0,0 +1,205 @@
+"""Очередь отложенных задач в базе данных.
+
+Функция регистрируется декоратором @task и ставится в очередь вызовом
+.delay(); строка Task пишется в текущей транзакции, поэтому задача
+появится в очереди только вместе с данными, которые её породили.
+Выполняют задачи процессы команды run_workers.
+
+При TASK_QUEUE_EAGER задачи выполняются сразу при постановке —
+так работают тесты, которым нужен результат задачи, и отладка без
+отдельных воркеров.
+"""
+import json
+import logging
+import os
+import socket
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+ENQUEUE_ATTEMPTS = 3
+
+
+class TaskFunction:
+    """Зарегистрированная задача; вызывается как обычная функция."""
+
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(
+        self, *args, dedup_key=None, priority=None, countdown=0, **kwargs
+    ):
+        return enqueue(
+            self.name, args, kwargs,
+            dedup_key=dedup_key,
+            priority=self.priority if priority is None else priority,
+            countdown=countdown,
+            max_attempts=self.max_attempts,
+        )
+
+
+def task(name=None, priority=0, max_attempts=5):
+    """Регистрирует функцию как задачу очереди под именем name."""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = TaskFunction(
+            func, task_name, priority, max_attempts
+        )
+        return registry[task_name]
+    return decorator
+
+
+def enqueue(
+    name, args=(), kwargs=None, dedup_key=None, priority=0, countdown=0,
+    max_attempts=5,
+):
+    """Ставит задачу в очередь и возвращает её строку.
+
+    Если задача с тем же dedup_key ещё ждёт или выполняется, новая
+    не создаётся и возвращается существующая. В режиме
+    TASK_QUEUE_EAGER задача выполняется сразу и возвращается None.
+    """
+    payload = json.dumps({'args': list(args), 'kwargs': kwargs or {}})
+    if settings.TASK_QUEUE_EAGER:
+        execute(name, payload)
+        return None
+    for attempt in range(ENQUEUE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return Task.objects.create(
+                    name=name,
+                    payload=payload,
+                    priority=priority,
+                    dedup_key=dedup_key,
+                    max_attempts=max_attempts,
+                    run_at=timezone.now() + timedelta(seconds=countdown),
+                )
+        except IntegrityError:
+            if dedup_key is None or attempt == ENQUEUE_ATTEMPTS - 1:
+                raise
+            # Задача с тем же ключом могла завершиться после вставки.
+            existing = Task.objects.filter(
+                dedup_key=dedup_key, status__in=Task.ACTIVE
+            ).first()
+            if existing is not None:
+                return existing
+
+
+def execute(name, payload):
+    if name not in registry:
+        raise LookupError(f'Неизвестная задача {name}')
+    data = json.loads(payload)
+    return registry[name](*data['args'], **data['kwargs'])
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def _claimable(now):
+    return Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now
+    ) | Task.objects.filter(status=Task.RUNNING, locked_until__lt=now)
+
+
+def claim(worker, limit):
+    """Забирает до limit задач для worker на время TASK_LEASE_SECONDS.
+
+    На базах с SELECT ... FOR UPDATE SKIP LOCKED строки блокируются
+    ей. SQLite её не поддерживает, но транзакция начинается с BEGIN
+    IMMEDIATE (core.backends.sqlite3), так что выборку и UPDATE
+    выполняет только один воркер за раз, и задача не достаётся двоим.
+    Задачи с истёкшей арендой (воркер упал) забираются заново.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = _claimable(now).order_by('-priority', 'run_at', 'pk')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        _claimable(now).filter(pk__in=ids).update(
+            status=Task.RUNNING,
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=settings.TASK_LEASE_SECONDS),
+        )
+        return list(
+            Task.objects.filter(
+                pk__in=ids, locked_by=worker, status=Task.RUNNING
+            ).order_by('-priority', 'run_at', 'pk')
+        )
+
+
+def backoff(attempts):
+    """Пауза перед повтором: растёт вдвое с каждой попыткой."""
+    return min(
+        settings.TASK_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.TASK_RETRY_BACKOFF_MAX,
+    )
+
+
+def _finish(task_row, worker, **fields):
+    """Записывает итог задачи, если аренда всё ещё у этого воркера."""
+    with transaction.atomic():
+        Task.objects.filter(pk=task_row.pk, locked_by=worker).update(
+            attempts=task_row.attempts, locked_by='', **fields
+        )
+
+
+def run(task_row, worker):
+    """Выполняет задачу; при ошибке повтор откладывается на backoff()
+    секунд, пока не кончатся попытки.
+
+    Задача выполняется в autocommit: с BEGIN IMMEDIATE общая транзакция
+    держала бы блокировку записи SQLite всё время задачи, вместе
+    с отправкой письма или рендером превью. Транзакции задачи сами
+    открывают вокруг своих записей.
+    """
+    task_row.attempts += 1
+    try:
+        execute(task_row.name, task_row.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Задача %s упала', task_row.name)
+        if task_row.attempts >= task_row.max_attempts:
+            _finish(
+                task_row, worker, status=Task.FAILED, last_error=error,
+                finished=timezone.now(),
+            )
+            return False
+        _finish(
+            task_row, worker, status=Task.QUEUED, last_error=error,
+            locked_until=None, run_at=timezone.now() + timedelta(
+                seconds=backoff(task_row.attempts)
+            ),
+        )
+        return False
+    _finish(
+        task_row, worker, status=Task.DONE, finished=timezone.now(),
+        locked_until=None,
+    )
+    return True
+
+
+def work(worker, batch_size):
+    """Забирает и выполняет одну порцию задач; возвращает её размер."""
+    claimed = claim(worker, batch_size)
+    for task_row in claimed:
+        run(task_row, worker)
+    return len(claimed)
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..cache import get_or_build
+
+
+class GetOrBuildTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_value_built_once(self):
+        """Значение собирается один раз и дальше берётся из кэша."""
+        build = mock.Mock(return_value='страница')
+        for _ in range(3):
+            self.assertEqual(get_or_build('key', build, 60), 'страница')
+        build.assert_called_once()
+
+    def test_stale_value_served_while_locked(self):
+        """Пока другой процесс пересобирает значение,
+        отдаётся старое значение без пересборки.
+        """
+        cache.set('key', ('старая', 0.1, 0))
+        cache.add('key:lock', 1)
+        build = mock.Mock(return_value='новая')
+        self.assertEqual(get_or_build('key', build, 60), 'старая')
+        build.assert_not_called()
+        cache.delete('key:lock')
+        self.assertEqual(get_or_build('key', build, 60), 'новая')
+
+    @mock.patch('core.cache.WAIT_STEPS', 1)
+    @mock.patch('core.cache.WAIT_INTERVAL', 0)
+    def test_foreign_lock_kept_after_wait(self):
+        """Не дождавшись чужой сборки, процесс собирает значение сам,
+        но чужую блокировку не снимает.
+        """
+        cache.add('key:lock', 1)
+        build = mock.Mock(return_value='своя')
+        self.assertEqual(get_or_build('key', build, 60), 'своя')
+        self.assertTrue(cache.has_key('key:lock'))
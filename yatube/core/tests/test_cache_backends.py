@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from ..cache_backends import TwoTierCache
+
+SHARED_STAND_IN = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-shared',
+    },
+}
+
+
+def make_process_cache(name, max_entries=10):
+    """Отдельный локальный уровень, как у другого процесса."""
+    return TwoTierCache(name, {
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_MAX_ENTRIES': max_entries,
+        },
+    })
+
+
+@override_settings(CACHES=SHARED_STAND_IN)
+class TwoTierCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.first = make_process_cache('first')
+        self.second = make_process_cache('second', max_entries=2)
+        self.first.clear()
+        self.second.clear()
+
+    def test_local_tier_serves_repeated_reads(self):
+        """Повторное чтение попадает в локальный уровень."""
+        self.first.set('key', 'значение')
+        before = self.first.stats()
+        self.assertEqual(self.first.get('key'), 'значение')
+        after = self.first.stats()
+        self.assertEqual(after['local_hits'] - before['local_hits'], 1)
+        self.assertEqual(after['shared_hits'], before['shared_hits'])
+
+    def test_writes_invalidate_other_processes(self):
+        """Запись и удаление в одном процессе видны в другом."""
+        self.first.set('key', 'старое')
+        self.assertEqual(self.second.get('key'), 'старое')
+        self.first.set('key', 'новое')
+        self.assertEqual(self.second.get('key'), 'новое')
+        self.first.delete('key')
+        self.assertIsNone(self.second.get('key'))
+
+    def test_local_tier_is_bounded(self):
+        """Локальный уровень вытесняет давно не читанные ключи."""
+        self.second.set_many({'a': 1, 'b': 2, 'c': 3})
+        before = self.second.stats()
+        self.assertEqual(self.second.get_many(['a', 'b', 'c']), {
+            'a': 1, 'b': 2, 'c': 3,
+        })
+        after = self.second.stats()
+        self.assertEqual(after['shared_hits'] - before['shared_hits'], 1)
+
+    def test_add_and_incr(self):
+        """add не перезаписывает значение, incr виден другим процессам."""
+        self.assertTrue(self.first.add('counter', 1))
+        self.assertFalse(self.second.add('counter', 5))
+        self.second.incr('counter')
+        self.assertEqual(self.first.get('counter'), 2)
+
+    def test_incr_delegates_to_shared(self):
+        """incr и decr идут атомарным incr общего кэша, а локальные
+        копии других процессов устаревают.
+        """
+        self.first.set('counter', 10, None)
+        self.assertEqual(self.second.get('counter'), 10)
+        with mock.patch.object(
+            TwoTierCache, 'set', side_effect=AssertionError
+        ):
+            self.assertEqual(self.first.incr('counter', 5), 15)
+            self.assertEqual(self.second.decr('counter', 3), 12)
+        self.assertEqual(self.first.get('counter'), 12)
+        self.assertEqual(self.second.get('counter'), 12)
+        self.assertEqual(caches['shared'].get('counter'), 12)
+        with self.assertRaises(ValueError):
+            self.first.incr('missing')
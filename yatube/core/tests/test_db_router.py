@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts import page_cache
+from posts.models import Post
+
+from ..replication import replicate
+
+User = get_user_model()
+REPLICA_DIR = tempfile.mkdtemp()
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        connections.databases['replica'] = {
+            **connections.databases['default'],
+            'NAME': os.path.join(REPLICA_DIR, 'replica.sqlite3'),
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        shutil.rmtree(REPLICA_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        replicate()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.profile_url = reverse('posts:profile', args=('author',))
+
+    def profile_texts(self, client):
+        page_cache.bump_generation()
+        response = client.get(self.profile_url)
+        return [post.text for post in response.context['page_obj']]
+
+    def test_reads_replica_and_writes_primary(self):
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertTrue(Post.objects.using('default').exists())
+        self.assertFalse(Post.objects.using('replica').exists())
+        self.assertEqual(self.profile_texts(self.reader_client), [])
+        replicate()
+        self.assertEqual(
+            self.profile_texts(self.reader_client), ['Новый пост']
+        )
+
+    def test_author_sticks_to_primary_after_write(self):
+        response = self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Свой пост'}
+        )
+        self.assertIn('replica_pin', response.cookies)
+        self.assertEqual(self.profile_texts(self.author_client), ['Свой пост'])
+        other_device = Client()
+        other_device.force_login(self.author)
+        self.assertEqual(self.profile_texts(other_device), ['Свой пост'])
+
+    def test_pin_expires(self):
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Свой пост'}
+        )
+        cache.clear()
+        self.author_client.cookies.pop('replica_pin')
+        self.assertEqual(self.profile_texts(self.author_client), [])
+
+    def test_follow_pins_reader(self):
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=('author',))
+        )
+        response = self.reader_client.get(self.profile_url)
+        self.assertTrue(response.context['following'])
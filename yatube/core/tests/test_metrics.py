@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import metrics
+
+METRICS_DIR = tempfile.mkdtemp()
+
+
+@override_settings(METRICS_DIR=METRICS_DIR)
+class MetricsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        for file_name in os.listdir(METRICS_DIR):
+            os.remove(os.path.join(METRICS_DIR, file_name))
+
+    def test_request_metrics(self):
+        self.client.get('/')
+        self.client.get('/about/author/')
+        self.client.get('/admin/login/')
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram', text)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 1', text
+        )
+        self.assertIn(
+            'yatube_requests_total{status="200",view="about:author"} 1', text
+        )
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', text)
+        self.assertIn('yatube_paginator_seconds_count{kind="cursor"} 1', text)
+        self.assertIn('yatube_cache_hit_ratio{cache="default"', text)
+        self.assertNotIn('admin', text)
+
+    def test_sums_processes(self):
+        metrics.inc('yatube_db_queries_total', 3, view='posts:index')
+        metrics.observe('yatube_thumbnail_seconds', 0.2)
+        other = {
+            'counters': [
+                ['yatube_db_queries_total', {'view': 'posts:index'}, 4],
+            ],
+            'histograms': [
+                ['yatube_thumbnail_seconds', {}, {
+                    'buckets': [[0.25, 1], [10, 1]], 'sum': 0.1, 'count': 1,
+                }],
+            ],
+        }
+        path = os.path.join(METRICS_DIR, f'{os.getppid()}-other.json')
+        with open(path, 'w') as stream:
+            json.dump(other, stream)
+        text = metrics.render()
+        self.assertIn('yatube_db_queries_total{view="posts:index"} 7', text)
+        self.assertIn('yatube_thumbnail_seconds_bucket{le="0.25"} 2', text)
+        self.assertIn('yatube_thumbnail_seconds_bucket{le="0.1"} 0', text)
+        self.assertIn('yatube_thumbnail_seconds_count 2', text)
+
+    def test_dead_process_files_pruned(self):
+        """Файл завершившегося процесса не учитывается и удаляется."""
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        path = os.path.join(METRICS_DIR, f'{process.pid}-dead.json')
+        with open(path, 'w') as stream:
+            json.dump({'counters': [
+                ['yatube_db_queries_total', {'view': 'posts:index'}, 100],
+            ], 'histograms': []}, stream)
+        metrics.inc('yatube_db_queries_total', 3, view='posts:index')
+        text = metrics.render()
+        self.assertIn('yatube_db_queries_total{view="posts:index"} 3', text)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(len(os.listdir(METRICS_DIR)), 1)
+
+    def test_forbidden_outside_allowed_ips(self):
+        response = self.client.get('/metrics/', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
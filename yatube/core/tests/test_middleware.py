@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+
+from .. import profiling
+
+User = get_user_model()
+PROFILES_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILING_DUMP_DIR=PROFILES_DIR)
+class ProfilingMiddlewareTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(PROFILES_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        profiling.clear()
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_disabled_by_default(self):
+        response = self.client.get('/', HTTP_X_PROFILE='1')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(profiling.recent(), [])
+
+    def test_header_from_staff(self):
+        response = self.staff_client.get('/', HTTP_X_PROFILE='1')
+        timing = response['Server-Timing']
+        for metric in ('total;dur=', 'db;dur=', 'tpl;dur=', 'cache;desc='):
+            self.assertIn(metric, timing)
+        entry, = profiling.recent()
+        self.assertEqual(entry['path'], '/')
+        self.assertEqual(entry['status'], 200)
+        self.assertGreater(entry['queries'], 0)
+        self.assertGreater(entry['template_ms'], 0)
+        self.assertIsNone(entry['profile'])
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_LOG_SIZE=3)
+    def test_ring_buffer(self):
+        for number in range(5):
+            self.client.get(f'/?page={number}')
+        self.assertEqual(len(profiling.recent()), 3)
+
+    def test_cprofile_dump(self):
+        self.staff_client.get('/', HTTP_X_PROFILE='cprofile')
+        entry, = profiling.recent()
+        self.assertTrue(os.path.isfile(entry['profile']))
+        self.assertTrue(entry['profile'].startswith(PROFILES_DIR))
+
+    def test_nested_render_counted_once(self):
+        """render_to_string внутри рендера страницы не добавляет
+        своё время к уже идущему замеру.
+        """
+        profiling.instrument_templates()
+        django_engine = engines['django']
+        inner = django_engine.from_string('карточка')
+        outer = django_engine.from_string('{{ card }}')
+        token = profiling.activate(profiling.RequestProfile('GET', '/'))
+        try:
+            with mock.patch.object(profiling, 'record_template') as record:
+                rendered = outer.render({'card': inner.render})
+        finally:
+            profiling.deactivate(token)
+        self.assertEqual(rendered, 'карточка')
+        record.assert_called_once()
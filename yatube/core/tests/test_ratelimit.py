@@ -0,0 +1,145 @@
+import copy
+import multiprocessing
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+
+from ..cache_backends import LockedFileBasedCache
+from ..ratelimit import hit, parse_rate, ratelimit
+
+User = get_user_model()
+RATELIMIT_DIR = tempfile.mkdtemp()
+CACHES = copy.deepcopy(settings.CACHES)
+CACHES['ratelimit']['LOCATION'] = RATELIMIT_DIR
+START = 60 * 1000
+
+
+def increment_many(directory, times, results):
+    counter = LockedFileBasedCache(directory, {})
+    for _ in range(times):
+        counter.incr('counter')
+    results.put(times)
+
+
+class LimiterTestMixin:
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(RATELIMIT_DIR, ignore_errors=True)
+
+    def setUp(self):
+        caches['ratelimit'].clear()
+
+
+@override_settings(CACHES=CACHES)
+class SlidingWindowTest(LimiterTestMixin, SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('5/h'), (5, 3600))
+        for rate in ('10', '10/w', 'x/m'):
+            with self.subTest(rate=rate), self.assertRaises(ValueError):
+                parse_rate(rate)
+
+    def test_limit_within_window(self):
+        for _ in range(3):
+            self.assertEqual(hit('scope', 'client', '3/m', now=START), 0)
+        self.assertEqual(hit('scope', 'client', '3/m', now=START + 15), 45)
+        self.assertEqual(hit('other', 'client', '3/m', now=START + 15), 0)
+        self.assertEqual(hit('scope', 'another', '3/m', now=START + 15), 0)
+
+    def test_previous_window_weight(self):
+        for _ in range(4):
+            hit('scope', 'client', '3/m', now=START)
+        self.assertGreater(hit('scope', 'client', '3/m', now=START + 75), 0)
+        self.assertEqual(hit('scope', 'client', '3/m', now=START + 150), 0)
+
+    def test_incr_keeps_expiry(self):
+        counter = caches['ratelimit']
+        counter.add('key', 1, 1)
+        self.assertEqual(counter.incr('key', 2), 3)
+        self.assertEqual(counter.get('key'), 3)
+        with self.assertRaises(ValueError):
+            counter.incr('missing')
+
+    def test_atomic_increments_across_processes(self):
+        counter = caches['ratelimit']
+        counter.add('counter', 0, None)
+        context = multiprocessing.get_context()
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=increment_many, args=(RATELIMIT_DIR, 50, results)
+            )
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        done = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        self.assertEqual(counter.get('counter'), done)
+
+    def test_decorator(self):
+        @ratelimit('2/m', scope='view')
+        def view(request):
+            return HttpResponse('ok')
+
+        factory = RequestFactory()
+        for _ in range(2):
+            self.assertEqual(view(factory.post('/')).status_code, 200)
+        self.assertEqual(view(factory.get('/')).status_code, 200)
+        response = view(factory.post('/'))
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        with self.settings(RATELIMIT_ENABLED=False):
+            self.assertEqual(view(factory.post('/')).status_code, 200)
+
+
+@override_settings(
+    CACHES=CACHES,
+    RATELIMITS={
+        'posts:profile_follow': ('2/m', ('GET', 'POST')),
+        'users:signup': ('1/h', ('POST',)),
+    },
+)
+class RateLimitMiddlewareTest(LimiterTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+
+    def test_per_user_limit(self):
+        url = reverse('posts:profile_follow', args=(self.author.username,))
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        for _ in range(2):
+            self.assertEqual(reader_client.get(url).status_code, 302)
+        response = reader_client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertTemplateUsed(response, 'core/429.html')
+        other_client = Client()
+        other_client.force_login(self.other)
+        self.assertEqual(other_client.get(url).status_code, 302)
+
+    def test_per_ip_limit_for_anonymous(self):
+        url = reverse('users:signup')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.post(url, {}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(
+            self.client.post(url, {}, REMOTE_ADDR='10.0.0.1').status_code,
+            429,
+        )
+        self.assertEqual(
+            self.client.post(url, {}, REMOTE_ADDR='10.0.0.2').status_code,
+            200,
+        )
@@ -0,0 +1,64 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from ..sqlite import create_stress_db, pragma_statements, stress
+
+PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 7000,
+}
+
+
+class SQLiteTuningTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'stress.sqlite3')
+        create_stress_db(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_busy_timeout_first(self):
+        self.assertEqual(pragma_statements(PRAGMAS), [
+            'PRAGMA busy_timeout = 7000',
+            'PRAGMA journal_mode = wal',
+            'PRAGMA synchronous = normal',
+        ])
+        with self.assertRaises(ValueError):
+            pragma_statements({'cache_size': '1; DROP TABLE posts_post'})
+
+    @override_settings(SQLITE_PRAGMAS=PRAGMAS)
+    def test_pragmas_applied_to_new_connection(self):
+        wrapper = connection.copy()
+        wrapper.settings_dict['NAME'] = self.path
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'wal')
+                cursor.execute('PRAGMA busy_timeout')
+                self.assertEqual(cursor.fetchone()[0], 7000)
+                cursor.execute('PRAGMA synchronous')
+                self.assertEqual(cursor.fetchone()[0], 1)
+        finally:
+            wrapper.close()
+
+    def test_stress_without_locked_errors(self):
+        totals = stress(self.path, writers=3, readers=3, seconds=1)
+        self.assertEqual(totals['writer']['errors'], 0)
+        self.assertEqual(totals['reader']['errors'], 0)
+        self.assertGreater(totals['writer']['ops_per_second'], 0)
+        self.assertGreater(totals['reader']['ops_per_second'], 0)
+        with closing(sqlite3.connect(self.path)) as db:
+            written, = db.execute(
+                'SELECT COUNT(*) FROM stress_item'
+            ).fetchone()
+        self.assertEqual(
+            written, round(totals['writer']['ops_per_second'])
+        )
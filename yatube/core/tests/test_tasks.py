@@ -0,0 +1,200 @@
+from datetime import timedelta
+from email.mime.text import MIMEText
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import (
+    TestCase, TransactionTestCase, override_settings,
+)
+from django.utils import timezone
+
+from .. import tasks
+from ..models import Task
+
+calls = []
+
+
+@tasks.task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@tasks.task(name='tests.in_atomic')
+def in_atomic():
+    calls.append(connection.in_atomic_block)
+
+
+@tasks.task(name='tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('сбой')
+
+
+@override_settings(
+    TASK_QUEUE_EAGER=False,
+    TASK_LEASE_SECONDS=60,
+    TASK_RETRY_BACKOFF=10,
+    TASK_RETRY_BACKOFF_MAX=15,
+)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_eager_mode_runs_immediately(self):
+        with self.settings(TASK_QUEUE_EAGER=True):
+            self.assertIsNone(record.delay('сразу'))
+        self.assertEqual(calls, ['сразу'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_priority_order(self):
+        record.delay('обычная')
+        record.delay('срочная', priority=5)
+        record.delay('позже', countdown=60)
+        self.assertEqual(tasks.work('worker', 10), 2)
+        self.assertEqual(calls, ['срочная', 'обычная'])
+        self.assertEqual(
+            Task.objects.filter(status=Task.DONE).count(), 2
+        )
+
+    def test_dedup_key(self):
+        first = record.delay('раз', dedup_key='one')
+        second = record.delay('два', dedup_key='one')
+        self.assertEqual(first.pk, second.pk)
+        tasks.work('worker', 10)
+        third = record.delay('три', dedup_key='one')
+        self.assertNotEqual(third.pk, first.pk)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_dedup_task_finished_during_enqueue(self):
+        """Если задача с тем же ключом успела завершиться, вставка
+        повторяется, а не падает.
+        """
+        create = Task.objects.create
+        failures = [IntegrityError()]
+
+        def create_after_race(**kwargs):
+            if failures:
+                raise failures.pop()
+            return create(**kwargs)
+
+        with mock.patch.object(
+            Task.objects, 'create', side_effect=create_after_race
+        ):
+            row = record.delay('снова', dedup_key='one')
+        self.assertEqual(row.dedup_key, 'one')
+        self.assertEqual(row.status, Task.QUEUED)
+
+    def test_batch_not_claimed_twice(self):
+        for value in range(5):
+            record.delay(value)
+        first = tasks.claim('first', 3)
+        second = tasks.claim('second', 3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(
+            {row.pk for row in first} & {row.pk for row in second}
+        )
+        self.assertEqual(tasks.claim('third', 3), [])
+
+    def test_expired_lease_reclaimed(self):
+        record.delay('упавший воркер')
+        tasks.claim('dead', 1)
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(tasks.work('alive', 1), 1)
+        self.assertEqual(calls, ['упавший воркер'])
+
+    def test_retry_with_backoff_then_fail(self):
+        self.assertEqual(tasks.backoff(1), 10)
+        self.assertEqual(tasks.backoff(3), 15)
+        explode.delay()
+        before = timezone.now()
+        with self.assertLogs('core.tasks', 'ERROR'):
+            tasks.work('worker', 1)
+        row = Task.objects.get()
+        self.assertEqual(row.status, Task.QUEUED)
+        self.assertEqual(row.attempts, 1)
+        self.assertIn('сбой', row.last_error)
+        self.assertGreaterEqual(row.run_at, before + timedelta(seconds=10))
+        self.assertEqual(tasks.work('worker', 1), 0)
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            tasks.work('worker', 1)
+        row.refresh_from_db()
+        self.assertEqual(row.status, Task.FAILED)
+        self.assertEqual(row.attempts, 2)
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        TASK_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_queued_email(self):
+        mail.send_mail('Тема', 'Текст', 'from@yatube.ru', ['to@yatube.ru'])
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Task.objects.get().priority, 10)
+        tasks.work('worker', 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
+        self.assertEqual(mail.outbox[0].to, ['to@yatube.ru'])
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        TASK_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_queued_email_attachments(self):
+        message = mail.EmailMessage('Вложения', 'Текст', to=['to@yatube.ru'])
+        message.attach('notes.txt', 'Заметки', 'text/plain')
+        message.attach('pixel.bin', b'\x00\xff', 'application/octet-stream')
+        message.send()
+        self.assertEqual(mail.outbox, [])
+        tasks.work('worker', 1)
+        sent, = mail.outbox
+        self.assertEqual(sent.attachments, [
+            ('notes.txt', 'Заметки', 'text/plain'),
+            ('pixel.bin', b'\x00\xff', 'application/octet-stream'),
+        ])
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        TASK_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_mime_attachment_sent_without_queue(self):
+        message = mail.EmailMessage('MIME', 'Текст', to=['to@yatube.ru'])
+        message.attach(MIMEText('часть'))
+        with self.assertLogs('core.mail', 'WARNING'):
+            self.assertEqual(message.send(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(Task.objects.exists())
+
+    def test_run_workers_once(self):
+        for value in range(3):
+            record.delay(value)
+        out = StringIO()
+        call_command(
+            'run_workers', processes=0, batch_size=2, once=True, stdout=out
+        )
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertIn('Выполнено задач: 3', out.getvalue())
+
+    def test_run_workers_flushes_metrics(self):
+        record.delay('метрика')
+        with mock.patch('core.metrics.flush') as flush:
+            call_command(
+                'run_workers', processes=0, once=True, stdout=StringIO()
+            )
+        flush.assert_any_call()
+        self.assertEqual(flush.call_args, mock.call(force=True))
+
+
+@override_settings(TASK_QUEUE_EAGER=False)
+class TaskTransactionTest(TransactionTestCase):
+    def test_task_runs_in_autocommit(self):
+        """Задача не держит транзакцию, а значит и блокировку записи
+        SQLite, пока выполняется.
+        """
+        calls.clear()
+        in_atomic.delay()
+        self.assertEqual(tasks.work('worker', 1), 1)
+        self.assertEqual(calls, [False])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
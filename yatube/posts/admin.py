@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
+from .search import SearchResults
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,6 +17,17 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ('group',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по обратному индексу вместо LIKE по всей таблице.
+
+        Найденные id отбираются подзапросом, а не списком параметров:
+        частое слово дало бы больше переменных, чем допускает SQLite.
+        """
+        results = SearchResults(search_term)
+        if not results.terms:
+            return queryset, False
+        return results.engine.filter(queryset, results.terms), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -0,0 +1,121 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+from django.views.decorators.vary import vary_on_cookie
+
+from core.decorators import conditional
+
+from . import counters, stamps
+from .models import Follow, Group, Post, User
+from .serializers import serialize_post
+from .utils import CursorPaginator
+
+POSTS = Post.objects.select_related('author', 'group')
+
+
+def feed_response(request, posts):
+    page = CursorPaginator(posts, settings.NUM_PAGE).get_cursor_page(
+        request.GET.get('cursor')
+    )
+    return JsonResponse({
+        'results': [serialize_post(post) for post in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
+
+def index_validators(request):
+    return stamps.validators(
+        stamps.scope('all'), extra=[request.get_full_path()]
+    )
+
+
+def group_validators(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return stamps.validators(
+        stamps.scope('group', group.pk),
+        extra=[request.get_full_path(), group.posts_count],
+    )
+
+
+def profile_validators(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
+    return stamps.validators(
+        stamps.scope('author', author.pk),
+        extra=[
+            request.get_full_path(),
+            counters.user_counters(author).posts_count,
+        ],
+    )
+
+
+def follow_validators(request):
+    author_ids = list(
+        Follow.objects.filter(user=request.user).values_list(
+            'author_id', flat=True
+        )
+    )
+    return stamps.validators(
+        stamps.scope('follow', request.user.pk),
+        *(stamps.scope('author', author_id) for author_id in author_ids),
+        extra=[request.get_full_path()],
+    )
+
+
+def post_validators(request, post_id):
+    return stamps.validators(
+        stamps.scope('post', post_id), extra=[request.get_full_path()]
+    )
+
+
+@require_GET
+@conditional(index_validators)
+def index(request):
+    return feed_response(request, POSTS)
+
+
+@require_GET
+@conditional(group_validators)
+def group_posts(request, slug):
+    return feed_response(request, POSTS.filter(group__slug=slug))
+
+
+@require_GET
+@conditional(profile_validators)
+def profile(request, username):
+    return feed_response(request, POSTS.filter(author__username=username))
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Требуется авторизация.'}, status=401
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@require_GET
+@vary_on_cookie
+@api_login_required
+@conditional(follow_validators)
+def follow_index(request):
+    return feed_response(
+        request, POSTS.filter(author__following__user=request.user)
+    )
+
+
+@require_GET
+@conditional(post_validators)
+def post_detail(request, post_id):
+    post = get_object_or_404(POSTS, pk=post_id)
+    return JsonResponse(
+        dict(serialize_post(post), comments_count=post.comments_count)
+    )
@@ -0,0 +1,193 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import mixer
+
+from . import urls
+from .models import Group, Post, User
+from .transfer import Importer
+
+VOLUMES = {'users': 50, 'groups': 5, 'posts': 2000, 'comments': 5000,
+           'follows': 200}
+METRICS = ('p50_ms', 'p95_ms', 'queries', 'alloc_kb')
+READER = 'bench_reader'
+QUERY_STRINGS = {'search': '?q=пост'}
+
+
+def seed(users, groups, posts, comments, follows, seed_value=0):
+    """Заполняет базу синтетическими данными через mixer и Faker.
+
+    Пользователи и группы создаются mixer-ом, посты, комментарии
+    и подписки загружаются пачками через Importer, который заодно
+    пересчитывает счётчики, индекс поиска и ленты.
+    """
+    fake = Faker('ru_RU')
+    Faker.seed(seed_value)
+    rand = random.Random(seed_value)
+    authors = [
+        user.username for user in mixer.cycle(users).blend(
+            User, username=mixer.sequence('bench_user{0}')
+        )
+    ]
+    slugs = [
+        group.slug for group in mixer.cycle(groups).blend(
+            Group, slug=mixer.sequence('bench-group-{0}')
+        )
+    ]
+    reader = User.objects.create_user(username=READER)
+    start = timezone.now() - timedelta(days=365)
+
+    def rows():
+        for pk in range(1, posts + 1):
+            yield {
+                'type': 'post', 'id': pk,
+                'author': rand.choice(authors),
+                'group': rand.choice(slugs + [None]),
+                'text': fake.text(max_nb_chars=400),
+                'pub_date': (start + timedelta(minutes=pk)).isoformat(),
+            }
+        for pk in range(1, comments + 1):
+            yield {
+                'type': 'comment', 'post': rand.randint(1, posts),
+                'author': rand.choice(authors),
+                'text': fake.sentence(),
+            }
+        for _ in range(follows):
+            yield {
+                'type': 'follow', 'user': rand.choice(authors + [READER]),
+                'author': rand.choice(authors),
+            }
+        for author in authors[:max(1, users // 5)]:
+            yield {'type': 'follow', 'user': READER, 'author': author}
+
+    importer = Importer(batch_size=1000)
+    importer.run(rows())
+    importer.finish()
+    return reader
+
+
+def collect_urls():
+    """Адрес для каждого маршрута posts.urls на засеянных данных."""
+    post = Post.objects.order_by('-comments_count').first()
+    author = post.author.username
+    group = Group.objects.order_by('-posts_count').first()
+    values = {
+        'slug': group.slug,
+        'username': author,
+        'post_id': post.pk,
+    }
+    found = {}
+    for pattern in urls.urlpatterns:
+        kwargs = {
+            name: values[name] for name in pattern.pattern.converters
+        }
+        found[pattern.name] = reverse(
+            f'posts:{pattern.name}', kwargs=kwargs
+        ) + QUERY_STRINGS.get(pattern.name, '')
+    return found
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class QueryCounter:
+    """Считает запросы к базе; connection.queries тестовый клиент
+    очищает в начале каждого запроса, поэтому он здесь не годится.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure_url(client, url, repeat):
+    """Время ответа, число запросов и выделенная память для адреса.
+
+    Первый запрос прогревает кэш, дальше замеряются повторные.
+    """
+    caches['default'].clear()
+    client.get(url)
+    timings = []
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'queries': queries.count // repeat,
+        'alloc_kb': round(peak / 1024, 1),
+    }
+
+
+def run(repeat=20, user=None):
+    """Замеры по всем адресам posts.urls от имени user."""
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    return {
+        name: measure_url(client, url, repeat)
+        for name, url in collect_urls().items()
+    }
+
+
+def compare(results, baseline, tolerance=1.5, slack_ms=2.0):
+    """Регрессии относительно baseline.
+
+    Время и память могут вырасти не больше чем в tolerance раз (для
+    времени ещё с запасом slack_ms на шум), число запросов — не расти
+    вовсе.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for metric in METRICS:
+            if metric not in old:
+                continue
+            if metric == 'queries':
+                limit = old[metric]
+            elif metric.endswith('_ms'):
+                limit = old[metric] * tolerance + slack_ms
+            else:
+                limit = old[metric] * tolerance
+            if metrics[metric] > limit:
+                regressions.append(
+                    f'{name}: {metric} {metrics[metric]} > {limit:g} '
+                    f'(было {old[metric]})'
+                )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)
+
+
+def save_baseline(results, path):
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(results, stream, ensure_ascii=False, indent=2,
+                  sort_keys=True)
+        stream.write('\n')
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_key(post_id, author_link):
+    return 'post_card:{}:{}:{}'.format(
+        settings.POST_CARD_CACHE_VERSION, post_id, int(author_link)
+    )
+
+
+def render_cards(posts, author_link=False):
+    """Список HTML карточек постов.
+
+    Готовые карточки достаются из кэша одним get_many, рендерятся
+    и кладутся в кэш только недостающие.
+    """
+    posts = list(posts)
+    keys = [card_key(post.pk, author_link) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {}
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            missing[key] = render_to_string(
+                CARD_TEMPLATE, {'post': post, 'author_link': author_link}
+            )
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+def invalidate_cards(post_ids):
+    """Сбрасывает закэшированные карточки постов.
+
+    Ключи удаляются сразу и ещё раз после коммита транзакции, чтобы
+    не осталась карточка, собранная по данным до коммита.
+    """
+    keys = [
+        card_key(post_id, author_link)
+        for post_id in post_ids
+        for author_link in (False, True)
+    ]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,77 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+
+def _increment(queryset, field, delta):
+    """Сдвигает счётчик на delta, не опуская его ниже нуля: счётчик,
+    разъехавшийся с данными (например, после импорта), не должен
+    мешать удалению записей.
+    """
+    if delta:
+        queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def change_user(user_id, field, delta):
+    _increment(UserCounters.objects.filter(user_id=user_id), field, delta)
+
+
+def change_group(group_id, delta):
+    _increment(Group.objects.filter(pk=group_id), 'posts_count', delta)
+
+
+def change_post(post_id, delta):
+    _increment(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def user_counters(user):
+    """Счётчики пользователя.
+
+    У пользователей, загруженных loaddata, строки счётчиков нет
+    (сигнал пропускает raw-сохранения) — она создаётся здесь по живым
+    данным.
+    """
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        pass
+    user.counters, _ = UserCounters.objects.get_or_create(
+        user=user,
+        defaults={
+            'posts_count': Post.objects.filter(author=user).count(),
+            'followers_count': Follow.objects.filter(author=user).count(),
+            'following_count': Follow.objects.filter(user=user).count(),
+        },
+    )
+    return user.counters
+
+
+def count_subquery(queryset, field, outer='pk'):
+    """Подзапрос COUNT(*) по queryset для каждой строки внешнего запроса."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef(outer)}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def recount():
+    """Пересчитывает все счётчики по живым данным."""
+    UserCounters.objects.bulk_create(
+        UserCounters(user_id=user_id) for user_id in User.objects.filter(
+            counters__isnull=True
+        ).values_list('pk', flat=True)
+    )
+    UserCounters.objects.update(
+        posts_count=count_subquery(Post.objects, 'author', 'user_id'),
+        followers_count=count_subquery(Follow.objects, 'author', 'user_id'),
+        following_count=count_subquery(Follow.objects, 'user', 'user_id'),
+    )
+    Group.objects.update(posts_count=count_subquery(Post.objects, 'group'))
+    Post.objects.update(
+        comments_count=count_subquery(Comment.objects, 'post')
+    )
@@ -0,0 +1,172 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Feed, FeedEntry, Follow, Post, UserCounters
+
+FEED_ORDERING = ('-pub_date', '-pk')
+
+
+def celebrity_ids(authors):
+    """id авторов, у которых подписчиков не меньше порога.
+
+    Посты таких авторов не раскладываются по лентам, а подмешиваются
+    при чтении.
+    """
+    return UserCounters.objects.filter(
+        user__in=authors,
+        followers_count__gte=settings.FEED_CELEBRITY_FOLLOWERS,
+    ).values_list('user_id', flat=True)
+
+
+def is_celebrity(author_id):
+    return celebrity_ids([author_id]).exists()
+
+
+class MergedFeed:
+    """Ленивое слияние нескольких лент, отсортированных по FEED_ORDERING.
+
+    При срезе из каждого источника берётся не больше stop записей,
+    затем они сливаются k-way merge по (pub_date, id).
+    """
+
+    def __init__(self, *sources):
+        self.sources = sources
+
+    def count(self):
+        return sum(source.count() for source in self.sources)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        merged = heapq.merge(
+            *(source[:stop] for source in self.sources),
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=True,
+        )
+        return list(islice(merged, start, stop))
+
+
+def _bulk_create_entries(entries):
+    with transaction.atomic():
+        FeedEntry.objects.bulk_create(
+            entries, batch_size=settings.FEED_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по собранным лентам подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    reader_ids = Feed.objects.filter(
+        user__follower__author=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_create_entries(
+        FeedEntry(user_id=reader_id, post=post, pub_date=post.pub_date)
+        for reader_id in reader_ids.iterator()
+    )
+
+
+def add_author(user_id, author_id):
+    """Добавляет посты автора в ленту читателя после подписки."""
+    if (
+        not Feed.objects.filter(user_id=user_id).exists()
+        or is_celebrity(author_id)
+    ):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )
+    _bulk_create_entries(
+        FeedEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in posts.iterator()
+    )
+
+
+def remove_author(user_id, author_id):
+    """Убирает посты автора из ленты читателя после отписки.
+
+    Если после отписки автор опустился ниже порога популярности, его
+    посты больше не подмешиваются при чтении, поэтому они
+    раскладываются по собранным лентам оставшихся подписчиков —
+    задачей в очереди, а не в запросе отписки.
+    """
+    from .tasks import backfill_author_feeds
+
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    followers_count = UserCounters.objects.filter(
+        user_id=author_id
+    ).values_list('followers_count', flat=True).first()
+    if followers_count == settings.FEED_CELEBRITY_FOLLOWERS - 1:
+        backfill_author_feeds.delay(
+            author_id, dedup_key=f'backfill:{author_id}'
+        )
+
+
+def backfill_author(author_id):
+    """Добавляет все посты автора в собранные ленты его подписчиков."""
+    reader_ids = list(Feed.objects.filter(
+        user__follower__author=author_id
+    ).values_list('user_id', flat=True))
+    if not reader_ids:
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )
+    _bulk_create_entries(
+        FeedEntry(user_id=reader_id, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in posts.iterator()
+        for reader_id in reader_ids
+    )
+
+
+@transaction.atomic
+def build_feed(user):
+    """Собирает ленту читателя заново по живому запросу."""
+    FeedEntry.objects.filter(user=user).delete()
+    authors = Follow.objects.filter(user=user).values('author')
+    posts = Post.objects.filter(author__in=authors).exclude(
+        author__in=list(celebrity_ids(authors))
+    ).values_list('pk', 'pub_date')
+    _bulk_create_entries(
+        FeedEntry(user=user, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in posts.iterator()
+    )
+    Feed.objects.update_or_create(user=user)
+
+
+def get_feed_posts(user):
+    """Посты ленты подписок.
+
+    Посты обычных авторов берутся из собранной ленты, посты популярных
+    авторов сливаются с ней при чтении. Если ленту читателя ещё
+    не собрали, посты выбираются живым запросом через подписки.
+    """
+    posts = Post.objects.select_related('author', 'group')
+    if not Feed.objects.filter(user=user).exists():
+        return posts.filter(author__following__user=user)
+    celebrities = list(
+        celebrity_ids(Follow.objects.filter(user=user).values('author'))
+    )
+    timeline = posts.filter(feed_entries__user=user).order_by(
+        F('feed_entries__pub_date').desc(), F('feed_entries__post_id').desc()
+    )
+    if not celebrities:
+        return timeline
+    return MergedFeed(
+        timeline.exclude(author__in=celebrities),
+        *(
+            posts.filter(author_id=author_id).order_by(*FEED_ORDERING)
+            for author_id in celebrities
+        )
+    )
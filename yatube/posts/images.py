@@ -0,0 +1,106 @@
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+from .models import Post
+from .storage import post_image_storage
+from .thumbnails import thumbnail_name
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+
+
+def output_format():
+    """Формат хранения картинок; без поддержки WebP в Pillow — JPEG."""
+    image_format = settings.POST_IMAGE_FORMAT.upper()
+    if image_format == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return image_format
+
+
+def flatten(image):
+    """Переводит картинку в RGB, подкладывая под прозрачность белый фон."""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def normalize_image(uploaded):
+    """Перекодирует загруженную картинку для хранения.
+
+    Картинка декодируется один раз, поворачивается по EXIF, теряет
+    метаданные, уменьшается до POST_IMAGE_MAX_SIZE и сохраняется
+    в POST_IMAGE_FORMAT. Анимированные картинки возвращаются как есть.
+    """
+    uploaded.seek(0)
+    image = Image.open(uploaded)
+    if getattr(image, 'is_animated', False):
+        uploaded.seek(0)
+        return uploaded
+    image = flatten(ImageOps.exif_transpose(image))
+    image.thumbnail(settings.POST_IMAGE_MAX_SIZE, Image.LANCZOS)
+    image_format = output_format()
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        image_format,
+        quality=settings.POST_IMAGE_QUALITY,
+        optimize=True,
+        progressive=True,
+    )
+    normalized = ContentFile(
+        buffer.getvalue(), name=f'image.{EXTENSIONS[image_format]}'
+    )
+    logger.info(
+        'Картинка %s: %d -> %d байт, сэкономлено %d',
+        uploaded.name, uploaded.size, normalized.size,
+        uploaded.size - normalized.size,
+    )
+    return normalized
+
+
+def _delete_unreferenced(image_name):
+    with post_image_storage.lock():
+        if (
+            Post.objects.filter(image=image_name).exists()
+            or post_image_storage.is_reused(image_name)
+        ):
+            return
+        for storage, name in (
+            (post_image_storage, image_name),
+            (default_storage, thumbnail_name(image_name)),
+        ):
+            try:
+                storage.delete(name)
+            except (OSError, SuspiciousFileOperation):
+                pass
+
+
+def confirm_image(image_name):
+    """После коммита пост со ссылкой на картинку виден в базе, и метка
+    повторного использования файла больше не нужна.
+    """
+    transaction.on_commit(
+        lambda: post_image_storage.confirm_reuse(image_name)
+    )
+
+
+def release_image(image_name):
+    """Снимает ссылку поста на картинку после коммита транзакции.
+
+    Число ссылок — число постов с этой картинкой, поэтому отдельный
+    счётчик не нужен: после коммита файл и его превью удаляются,
+    если ссылок не осталось.
+    """
+    if image_name:
+        transaction.on_commit(lambda: _delete_unreferenced(image_name))
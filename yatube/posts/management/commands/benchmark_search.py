@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.search import search_posts
+
+DEFAULT_QUERIES = ('пост', 'тестовая запись', 'котики')
+
+
+def timed(run, repeat):
+    """Среднее время одного прогона в миллисекундах и его результат."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = run()
+    return (time.perf_counter() - started) * 1000 / repeat, result
+
+
+def like_page(query):
+    posts = Post.objects.all()
+    for word in query.split():
+        posts = posts.filter(text__icontains=word)
+    return posts.count(), list(posts[:settings.NUM_PAGE])
+
+
+def index_page(query):
+    results = search_posts(query)
+    return results.count(), results[:settings.NUM_PAGE]
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает поиск по индексу с поиском LIKE по всей таблице.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'queries', nargs='*', default=DEFAULT_QUERIES,
+            help='Поисковые запросы.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Число прогонов каждого запроса.'
+        )
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        self.stdout.write(f'Постов в базе: {Post.objects.count()}')
+        for query in options['queries']:
+            like_ms, (like_count, _) = timed(lambda: like_page(query), repeat)
+            index_ms, (index_count, _) = timed(
+                lambda: index_page(query), repeat
+            )
+            self.stdout.write(
+                f'{query!r}: LIKE {like_ms:.2f} мс ({like_count}), '
+                f'индекс {index_ms:.2f} мс ({index_count}), '
+                f'ускорение x{like_ms / max(index_ms, 1e-6):.1f}'
+            )
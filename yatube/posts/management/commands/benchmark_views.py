@@ -0,0 +1,113 @@
+import copy
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_test_environment, teardown_test_environment,
+)
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет тестовую базу синтетическими данными и замеряет время '
+        'ответа, число запросов и память для всех адресов posts.urls.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in benchmark.VOLUMES.items():
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать: {name}.'
+            )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Число замеров каждого адреса.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора данных.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON с прошлыми замерами; при регрессии команда падает.'
+        )
+        parser.add_argument(
+            '--save-baseline', help='Куда сохранить замеры в JSON.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=1.5,
+            help='Во сколько раз могут вырасти время и память.'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть больше нуля')
+        if options['posts'] < 1 or options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь и пост')
+        baseline = None
+        if options['baseline']:
+            try:
+                baseline = benchmark.load_baseline(options['baseline'])
+            except (OSError, ValueError) as error:
+                raise CommandError(error)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            caches = copy.deepcopy(settings.CACHES)
+            caches['shared']['LOCATION'] = cache_dir
+            caches[settings.RATELIMIT_CACHE]['LOCATION'] = os.path.join(
+                cache_dir, 'ratelimit'
+            )
+            with override_settings(
+                CACHES=caches,
+                METRICS_DIR=os.path.join(cache_dir, 'metrics'),
+                RATELIMIT_ENABLED=False,
+            ):
+                results = self.measure(options)
+        self.report(results)
+        if options['save_baseline']:
+            benchmark.save_baseline(results, options['save_baseline'])
+        if baseline is not None:
+            regressions = benchmark.compare(
+                results, baseline, options['tolerance']
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def measure(self, options):
+        """Замеры на отдельной тестовой базе, рабочая не затрагивается."""
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            started = time.perf_counter()
+            reader = benchmark.seed(
+                **{name: options[name] for name in benchmark.VOLUMES},
+                seed_value=options['seed'],
+            )
+            self.stdout.write(
+                f'Данные созданы за {time.perf_counter() - started:.1f} с'
+            )
+            return benchmark.run(options['repeat'], reader)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"адрес":<18}' + ''.join(
+                f'{metric:>10}' for metric in benchmark.METRICS
+            )
+        )
+        for name, metrics in results.items():
+            self.stdout.write(f'{name:<18}' + ''.join(
+                f'{metrics[metric]:>10}' for metric in benchmark.METRICS
+            ))
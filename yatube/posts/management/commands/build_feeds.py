@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.feed import build_feed
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Собирает материализованные ленты подписок пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Имена пользователей; по умолчанию все, у кого есть подписки.'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(follower__isnull=False).distinct()
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        built = 0
+        for user in users.iterator():
+            build_feed(user)
+            built += 1
+        self.stdout.write(self.style.SUCCESS(f'Собрано лент: {built}'))
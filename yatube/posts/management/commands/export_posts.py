@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import FORMATS, TYPES, export_rows, write_rows
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии и подписки в JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o', default='-',
+            help='Файл выгрузки; по умолчанию stdout.'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию по расширению, иначе jsonl.'
+        )
+        parser.add_argument(
+            '--types', nargs='+', choices=TYPES, default=TYPES,
+            help='Что выгружать.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько записей читать из базы за раз.'
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        file_format = options['format'] or (
+            'csv' if output.endswith('.csv') else 'jsonl'
+        )
+        rows = export_rows(options['types'], options['chunk_size'])
+        started = time.perf_counter()
+        if output == '-':
+            written = write_rows(rows, self.stdout, file_format)
+        else:
+            try:
+                stream = open(output, 'w', encoding='utf-8', newline='')
+            except OSError as error:
+                raise CommandError(error)
+            with stream:
+                written = write_rows(rows, stream, file_format)
+        elapsed = time.perf_counter() - started
+        self.stderr.write(
+            f'Выгружено строк: {written}, '
+            f'{written / max(elapsed, 1e-6):.0f} строк/с'
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnail
+
+
+class Command(BaseCommand):
+    help = 'Готовит превью картинок постов, у которых его ещё нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать превью у всех постов с картинками.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(thumbnail='')
+        generated = 0
+        rendered = set()
+        for post_id, image_name in posts.values_list('pk', 'image').iterator():
+            force = options['all'] and image_name not in rendered
+            if generate_thumbnail(post_id, image_name, force=force):
+                generated += 1
+            rendered.add(image_name)
+        self.stdout.write(self.style.SUCCESS(f'Готово превью: {generated}'))
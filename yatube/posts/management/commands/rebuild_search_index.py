@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс по текстам всех постов.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = search.rebuild()
+        engine = type(search.get_engine()).__name__
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {indexed} ({engine})'
+        ))
@@ -2,15 +2,22 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 
-from core.models import CreatedModel
+from core.models import CountersModel, CreatedModel
+
+from .storage import post_image_storage
 
 User = get_user_model()
 
 
-class Group(models.Model):
+class Group(CountersModel):
     title = models.CharField(verbose_name='Название группы', max_length=200)
     slug = models.SlugField(verbose_name='Слаг', unique=True)
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Число постов', default=0, editable=False
+    )
+
+    counter_fields = ('posts_count',)
 
     class Meta:
         verbose_name = 'Группа'
@@ -20,7 +27,7 @@ class Group(models.Model):
         return self.title
 
 
-class Post(CreatedModel):
+class Post(CreatedModel, CountersModel):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Текст нового поста'
@@ -41,14 +48,36 @@ class Post(CreatedModel):
     image = models.ImageField(
         verbose_name='Картинка',
         upload_to='posts/',
-        blank=True
+        storage=post_image_storage,
+        blank=True,
+        db_index=True
+    )
+    thumbnail = models.ImageField(
+        verbose_name='Превью картинки',
+        upload_to='posts/thumbs/',
+        blank=True,
+        editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Число комментариев', default=0, editable=False
     )
 
+    counter_fields = ('comments_count',)
+
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ('-pub_date', )
         default_related_name = 'posts'
+        indexes = [
+            models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+            models.Index(
+                fields=['author', 'pub_date'], name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'], name='post_group_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:settings.NUM_LETTER]
@@ -74,6 +103,11 @@ class Comment(CreatedModel):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
+        indexes = [
+            models.Index(
+                fields=['post', 'pub_date'], name='comment_post_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:settings.NUM_LETTER]
@@ -106,6 +140,112 @@ class Follow(models.Model):
                 name='follower not following',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.user.username
+
+
+class UserCounters(models.Model):
+    """Счётчики пользователя, поддерживаемые при записи."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='counters',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков', default=0
+    )
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return self.user.username
+
+
+class Feed(models.Model):
+    """Отметка о том, что ленту подписок пользователя уже собрали."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Читатель'
+    )
+    built = models.DateTimeField('Дата сборки', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Лента'
+        verbose_name_plural = 'Ленты'
+
+    def __str__(self):
+        return self.user.username
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique feed entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_post_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username}: {self.post}'
+
+
+class PostTerm(models.Model):
+    """Вхождение основы слова в текст поста для обратного индекса."""
+    TERM_LENGTH = 64
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='terms',
+        verbose_name='Пост'
+    )
+    term = models.CharField('Основа слова', max_length=TERM_LENGTH)
+    count = models.PositiveIntegerField('Число вхождений', default=1)
+
+    class Meta:
+        verbose_name = 'Слово поста'
+        verbose_name_plural = 'Слова постов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'], name='unique post term'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.term}: {self.post_id}'
@@ -0,0 +1,48 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import get_or_build
+
+GENERATION_KEY = 'posts_generation'
+
+
+def generation():
+    """Текущее поколение лент: меняется при любой правке постов."""
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        cache.add(GENERATION_KEY, int(time.time() * 1000000), None)
+        value = cache.get(GENERATION_KEY)
+    return value
+
+
+def _incr_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        generation()
+
+
+def bump_generation():
+    """Сдвигает поколение сразу и ещё раз после коммита транзакции,
+    чтобы не остались страницы, собранные до коммита.
+    """
+    _incr_generation()
+    transaction.on_commit(_incr_generation)
+
+
+def page_key(path):
+    digest = hashlib.md5(path.encode()).hexdigest()
+    return f'posts_page:{generation()}:{digest}'
+
+
+def cached_page_body(request, build):
+    """HTML общей для всех пользователей части страницы ленты."""
+    return get_or_build(
+        page_key(request.get_full_path()),
+        build,
+        settings.PAGE_CACHE_TIMEOUT,
+    )
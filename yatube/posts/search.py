@@ -0,0 +1,228 @@
+import math
+import re
+import sqlite3
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+from .models import Post, PostTerm
+from .stemmer import stem
+
+FTS_TABLE = 'posts_post_fts'
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Основы слов текста в порядке появления."""
+    return [stem(word) for word in WORD_RE.findall(text.lower())]
+
+
+@lru_cache(maxsize=None)
+def fts5_available():
+    try:
+        sqlite3.connect(':memory:').execute(
+            'CREATE VIRTUAL TABLE test USING fts5(text)'
+        )
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+class FTS5Engine:
+    """Индекс в виртуальной таблице SQLite FTS5.
+
+    В таблицу пишутся уже выделенные основы слов, ранжирование —
+    встроенной функцией bm25.
+    """
+
+    def index(self, posts):
+        """Индексирует пары (id, текст), заменяя прежние записи."""
+        rows = [(pk, ' '.join(tokenize(text))) for pk, text in posts]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk, _ in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, terms) VALUES (%s, %s)',
+                rows,
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def _match(self, terms):
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def count(self, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                [self._match(terms)],
+            )
+            return cursor.fetchone()[0]
+
+    def filter(self, posts, terms):
+        """Все найденные посты из posts, отобранные подзапросом."""
+        return posts.extra(
+            where=[
+                f'{Post._meta.db_table}.id IN (SELECT rowid FROM '
+                f'{FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=[self._match(terms)],
+        )
+
+    def ranked_ids(self, terms, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                'ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+                [self._match(terms), limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PythonEngine:
+    """Обратный индекс в таблице PostTerm с ранжированием TF-IDF.
+
+    Работает на любой базе; списки вхождений сливаются в Python.
+    """
+
+    def index(self, posts):
+        """Индексирует пары (id, текст), заменяя прежние записи."""
+        posts = list(posts)
+        PostTerm.objects.filter(post_id__in=[pk for pk, _ in posts]).delete()
+        PostTerm.objects.bulk_create(
+            (
+                PostTerm(post_id=pk, term=term, count=count)
+                for pk, text in posts
+                for term, count in Counter(
+                    term[:PostTerm.TERM_LENGTH] for term in tokenize(text)
+                ).items()
+            ),
+            batch_size=500,
+        )
+
+    def remove(self, post_id):
+        PostTerm.objects.filter(post_id=post_id).delete()
+
+    def clear(self):
+        PostTerm.objects.all().delete()
+
+    def _scores(self, terms):
+        terms = {term[:PostTerm.TERM_LENGTH] for term in terms}
+        postings = defaultdict(dict)
+        for term, post_id, count in PostTerm.objects.filter(
+            term__in=terms
+        ).values_list('term', 'post_id', 'count').iterator():
+            postings[term][post_id] = count
+        if len(postings) < len(terms):
+            return []
+        total = Post.objects.count()
+        scores = defaultdict(float)
+        for documents in postings.values():
+            idf = math.log(1 + total / len(documents))
+            for post_id, count in documents.items():
+                scores[post_id] += (1 + math.log(count)) * idf
+        matched = set.intersection(*(set(docs) for docs in postings.values()))
+        return sorted(
+            ((scores[post_id], post_id) for post_id in matched), reverse=True
+        )
+
+    def count(self, terms):
+        return len(self._scores(terms))
+
+    def filter(self, posts, terms):
+        """Все найденные посты из posts, отобранные подзапросом."""
+        terms = {term[:PostTerm.TERM_LENGTH] for term in terms}
+        return posts.filter(pk__in=PostTerm.objects.filter(
+            term__in=terms
+        ).values('post_id').annotate(matched=Count('term')).filter(
+            matched=len(terms)
+        ).values('post_id'))
+
+    def ranked_ids(self, terms, offset, limit):
+        scores = self._scores(terms)[offset:offset + limit]
+        return [post_id for _, post_id in scores]
+
+
+def get_engine():
+    """Движок из настройки SEARCH_ENGINE: fts5, python или auto."""
+    name = settings.SEARCH_ENGINE
+    if name == 'auto':
+        name = (
+            'fts5' if connection.vendor == 'sqlite' and fts5_available()
+            else 'python'
+        )
+    return FTS5Engine() if name == 'fts5' else PythonEngine()
+
+
+def index_post(post):
+    get_engine().index([(post.pk, post.text)])
+
+
+def remove_post(post_id):
+    get_engine().remove(post_id)
+
+
+def rebuild(batch_size=500):
+    """Заново строит индекс по всем постам. Возвращает число постов."""
+    engine = get_engine()
+    engine.clear()
+    posts = Post.objects.order_by('pk').values_list('pk', 'text')
+    indexed = 0
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return indexed
+        engine.index(batch)
+        indexed += len(batch)
+        last_pk = batch[-1][0]
+
+
+class SearchResults:
+    """Найденные посты в порядке релевантности.
+
+    Поддерживает count() и срезы, поэтому годится для Paginator:
+    из индекса читается только нужная страница.
+    """
+
+    def __init__(self, query, posts=None):
+        self.terms = list(dict.fromkeys(tokenize(query)))
+        self.posts = posts if posts is not None else Post.objects.all()
+        self.engine = get_engine()
+
+    def count(self):
+        if not self.terms:
+            return 0
+        return self.engine.count(self.terms)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if not self.terms:
+            return []
+        start = index.start or 0
+        ids = self.engine.ranked_ids(self.terms, start, index.stop - start)
+        posts = self.posts.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    return SearchResults(
+        query, Post.objects.select_related('author', 'group')
+    )
@@ -0,0 +1,19 @@
+def serialize_post(post):
+    """Пост для JSON API: только то, что нужно для карточки ленты."""
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'image': post.image.url if post.image else None,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'pub_date': comment.pub_date.isoformat(),
+    }
@@ -0,0 +1,221 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from . import (
+    cards, counters, feed, images, page_cache, search, stamps, tasks,
+    thumbnails,
+)
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=User)
+def create_user_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, raw=False, **kwargs):
+    instance._image_changed = bool(instance.image)
+    if raw or instance._state.adding:
+        return
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'image', 'thumbnail'
+    ).first()
+    if previous is None:
+        return
+    instance._previous_group_id, image, thumbnail = previous
+    instance._image_changed = instance.image.name != image
+    if instance._image_changed:
+        instance._previous_image = image
+        thumbnail = ''
+    instance.thumbnail = thumbnail
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change_user(instance.author_id, 'posts_count', 1)
+        counters.change_group(instance.group_id, 1)
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id != instance.group_id:
+        counters.change_group(previous_group_id, -1)
+        counters.change_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'posts_count', -1)
+    counters.change_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user(instance.user_id, 'following_count', 1)
+        counters.change_user(instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change_user(instance.user_id, 'following_count', -1)
+    counters.change_user(instance.author_id, 'followers_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def schedule_post_thumbnail(sender, instance, raw=False, **kwargs):
+    if not raw and instance.image and instance._image_changed:
+        thumbnails.schedule_thumbnail(instance)
+
+
+@receiver(post_save, sender=Post)
+def confirm_saved_image(sender, instance, raw=False, **kwargs):
+    if not raw and instance.image and instance._image_changed:
+        images.confirm_image(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def release_previous_image(sender, instance, raw=False, **kwargs):
+    previous_image = getattr(instance, '_previous_image', None)
+    if not raw and previous_image:
+        images.release_image(previous_image)
+        del instance._previous_image
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    images.release_image(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    if not raw and (not update_fields or 'text' in update_fields):
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_index(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        tasks.fan_out_post.delay(
+            instance.pk, dedup_key=f'fan_out:{instance.pk}'
+        )
+
+
+@receiver(post_save, sender=Follow)
+def add_followed_author(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.author_id:
+        feed.add_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_unfollowed_author(sender, instance, **kwargs):
+    feed.remove_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, created=False, **kwargs):
+    page_cache.bump_generation()
+    if not created:
+        cards.invalidate_cards([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cards(
+    sender, instance, created, update_fields=None, raw=False, **kwargs
+):
+    if created or raw or (
+        update_fields and not CARD_USER_FIELDS.intersection(update_fields)
+    ):
+        return
+    page_cache.bump_generation()
+    post_ids = list(instance.posts.values_list('pk', flat=True))
+    cards.invalidate_cards(post_ids)
+    group_ids = instance.posts.exclude(group=None).values_list(
+        'group_id', flat=True
+    ).distinct()
+    stamps.touch(
+        stamps.scope('all'),
+        stamps.scope('author', instance.pk),
+        *(stamps.scope('group', group_id) for group_id in group_ids),
+        *(stamps.scope('post', post_id) for post_id in post_ids)
+    )
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_cards(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        page_cache.bump_generation()
+        post_ids = list(instance.posts.values_list('pk', flat=True))
+        cards.invalidate_cards(post_ids)
+        stamps.touch(
+            stamps.scope('all'),
+            stamps.scope('group', instance.pk),
+            *(stamps.scope('post', post_id) for post_id in post_ids)
+        )
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_posts(sender, instance, **kwargs):
+    # После удаления группы у постов уже group=NULL (SET_NULL).
+    instance._post_ids = list(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_deleted_group_cards(sender, instance, **kwargs):
+    post_ids = getattr(instance, '_post_ids', [])
+    page_cache.bump_generation()
+    cards.invalidate_cards(post_ids)
+    stamps.touch(
+        stamps.scope('all'),
+        stamps.scope('group', instance.pk),
+        *(stamps.scope('post', post_id) for post_id in post_ids)
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def touch_post_stamps(sender, instance, raw=False, **kwargs):
+    if not raw:
+        stamps.touch_post(
+            instance, getattr(instance, '_previous_group_id', None)
+        )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_stamps(sender, instance, raw=False, **kwargs):
+    if not raw:
+        stamps.touch(stamps.scope('post', instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def touch_follow_stamps(sender, instance, raw=False, **kwargs):
+    if not raw:
+        stamps.touch(stamps.scope('follow', instance.user_id))
@@ -0,0 +1,70 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+STAMP_KEY = 'feed_stamp:{}'
+
+
+def scope(name, pk=None):
+    """Имя ленты: all, group:<id>, author:<id>, post:<id>, follow:<id>."""
+    return name if pk is None else f'{name}:{pk}'
+
+
+def _now():
+    return int(time.time() * 1000000)
+
+
+def get_stamps(*scopes):
+    """Время последнего изменения лент в микросекундах.
+
+    Если метки нет в кэше, она заводится текущим временем: клиенты
+    один раз получат полный ответ, но устаревших данных не увидят.
+    """
+    keys = {STAMP_KEY.format(name): name for name in scopes}
+    found = cache.get_many(keys)
+    missing = {key: _now() for key in keys if key not in found}
+    if missing:
+        for key, value in missing.items():
+            cache.add(key, value, None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: value for key, value in found.items()}
+
+
+def _set_stamps(scopes):
+    now = _now()
+    cache.set_many({STAMP_KEY.format(name): now for name in scopes}, None)
+
+
+def touch(*scopes):
+    """Отмечает изменение лент сразу и ещё раз после коммита,
+    чтобы метка не оказалась раньше видимых читателям данных.
+    """
+    scopes = [name for name in scopes if name]
+    _set_stamps(scopes)
+    transaction.on_commit(lambda: _set_stamps(scopes))
+
+
+def touch_post(post, group_id=None):
+    """Отмечает изменение поста во всех лентах, где он виден."""
+    touch(
+        scope('all'),
+        scope('author', post.author_id),
+        scope('post', post.pk),
+        post.group_id and scope('group', post.group_id),
+        group_id and scope('group', group_id),
+    )
+
+
+def validators(*scopes, extra=()):
+    """ETag и Last-Modified ответа по меткам лент.
+
+    В ETag попадают метки, а также extra — например, путь с курсором
+    и счётчики. Last-Modified — самая поздняя из меток в секундах.
+    """
+    stamps = get_stamps(*scopes)
+    parts = [f'{name}={stamps[name]}' for name in scopes]
+    parts.extend(str(value) for value in extra)
+    etag = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return etag, max(stamps.values()) // 1000000
@@ -0,0 +1,116 @@
+"""Стеммер Snowball для русского языка.
+
+Реализация алгоритма
+https://snowballstem.org/algorithms/russian/stemmer.html
+без внешних зависимостей.
+"""
+from functools import lru_cache
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+        'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+        'ая', 'яя', 'ою', 'ею',
+    ),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+        'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+        'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+        'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    (),
+    (
+        'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+        'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+        'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+        'ья', 'я',
+    ),
+)
+SUPERLATIVE = ((), ('ейш', 'ейше'))
+DERIVATIONAL = ((), ('ост', 'ость'))
+
+
+def _region(word, start):
+    """Начало области после первой согласной, идущей за гласной."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _remove(rv, endings):
+    """Отрезает самое длинное окончание из endings.
+
+    Окончания первой группы отрезаются, только если перед ними
+    стоит «а» или «я». Возвращает (основа, удалось ли отрезать).
+    """
+    conditional, plain = endings
+    candidates = [(ending, True) for ending in conditional]
+    candidates += [(ending, False) for ending in plain]
+    candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+    for ending, needs_a in candidates:
+        if not rv.endswith(ending):
+            continue
+        stem = rv[:-len(ending)]
+        if needs_a and not stem.endswith(('а', 'я')):
+            return rv, False
+        return stem, True
+    return rv, False
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    """Основа русского слова; слова без гласных возвращаются как есть."""
+    word = word.lower().replace('ё', 'е')
+    rv_start = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        None
+    )
+    if rv_start is None:
+        return word
+    r2_start = _region(word, _region(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    rv, removed = _remove(rv, PERFECTIVE_GERUND)
+    if not removed:
+        rv, _ = _remove(rv, REFLEXIVE)
+        rv, removed = _remove(rv, ADJECTIVE)
+        if removed:
+            rv, _ = _remove(rv, PARTICIPLE)
+        else:
+            rv, removed = _remove(rv, VERB)
+            if not removed:
+                rv, _ = _remove(rv, NOUN)
+
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    derivational, removed = _remove(rv, DERIVATIONAL)
+    if removed and rv_start + len(derivational) >= r2_start:
+        rv = derivational
+
+    rv, removed = _remove(rv, SUPERLATIVE)
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    elif not removed and rv.endswith('ь'):
+        rv = rv[:-1]
+    return prefix + rv
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import locks
+from django.core.files.storage import FileSystemStorage
+
+LOCK_NAME = '.images.lock'
+REUSE_KEY = 'image_reuse:{}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, где имя файла — SHA-256 его содержимого.
+
+    Повторная загрузка той же картинки не пишет новый файл, а получает
+    имя уже сохранённого. Файл удаляется через release_image, когда
+    на него не ссылается ни один пост.
+
+    Файл пишется под временным именем и появляется под своим одной
+    операцией link, так что параллельные загрузки одной картинки
+    не видят его недописанным и не мешают друг другу. Повторное
+    использование файла и его удаление идут под общей блокировкой:
+    пока пост с повторной загрузкой не закоммичен, файл помечен
+    в кэше на POST_IMAGE_REUSE_GRACE секунд, и удалять его нельзя.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    @contextmanager
+    def lock(self):
+        """Блокировка между процессами на повторное использование
+        и удаление файлов.
+        """
+        os.makedirs(self.location, exist_ok=True)
+        with open(os.path.join(self.location, LOCK_NAME), 'ab') as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock_file)
+
+    def is_reused(self, name):
+        return cache.get(REUSE_KEY.format(name)) is not None
+
+    def confirm_reuse(self, name):
+        cache.delete(REUSE_KEY.format(name))
+
+    def _reuse(self, name):
+        cache.set(
+            REUSE_KEY.format(name), True, settings.POST_IMAGE_REUSE_GRACE
+        )
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest.hexdigest() + extension)
+        with self.lock():
+            if self.exists(name):
+                return self._reuse(name)
+        temp_name = super()._save(
+            os.path.join(directory, f'tmp_{uuid.uuid4().hex}{extension}'),
+            content,
+        )
+        try:
+            with self.lock():
+                try:
+                    os.link(self.path(temp_name), self.path(name))
+                except FileExistsError:
+                    # Тот же файл только что сохранила параллельная загрузка.
+                    return self._reuse(name)
+        finally:
+            os.remove(self.path(temp_name))
+        return name
+
+
+post_image_storage = ContentAddressedStorage()
@@ -0,0 +1,23 @@
+from core.tasks import task
+
+from . import feed, thumbnails
+from .models import Post
+
+
+@task()
+def generate_post_thumbnail(post_id, image_name):
+    thumbnails.generate_thumbnail(post_id, image_name)
+
+
+@task()
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'author_id', 'pub_date'
+    ).first()
+    if post is not None:
+        feed.fan_out_post(post)
+
+
+@task()
+def backfill_author_feeds(author_id):
+    feed.backfill_author(author_id)
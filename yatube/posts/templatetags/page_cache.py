@@ -0,0 +1,27 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..page_cache import cached_page_body
+
+register = template.Library()
+
+
+class PageCacheNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        return mark_safe(cached_page_body(
+            context['request'], lambda: self.nodelist.render(context)
+        ))
+
+
+@register.tag
+def page_cache(parser, token):
+    """Кэширует блок страницы ленты до следующей правки постов.
+
+    Внутри блока не должно быть ничего, что зависит от пользователя.
+    """
+    nodelist = parser.parse(('endpage_cache',))
+    parser.delete_first_token()
+    return PageCacheNode(nodelist)
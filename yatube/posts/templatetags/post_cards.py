@@ -0,0 +1,10 @@
+from django import template
+
+from ..cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, author_link=False):
+    return render_cards(posts, author_link)
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {i}')
+            for i in range(settings.NUM_PAGE + 1)
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Последний пост'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(ApiTests.reader)
+
+    def assertNotModified(self, client, url):
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_feeds(self):
+        """Ленты отдают компактные посты с курсором на следующую страницу."""
+        urls = (
+            reverse('api:index'),
+            reverse('api:group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('api:profile', kwargs={'username': 'auth'}),
+            reverse('api:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.reader_client.get(url).json()
+                self.assertEqual(len(data['results']), settings.NUM_PAGE)
+                self.assertEqual(data['results'][0], {
+                    'id': ApiTests.post.pk,
+                    'text': 'Последний пост',
+                    'pub_date': ApiTests.post.pub_date.isoformat(),
+                    'author': 'auth',
+                    'group': 'test-slug',
+                    'image': None,
+                })
+                data = self.reader_client.get(
+                    url, {'cursor': data['next_cursor']}
+                ).json()
+                self.assertEqual(len(data['results']), 2)
+                self.assertIsNone(data['next_cursor'])
+
+    def test_not_modified_without_post_queries(self):
+        url = reverse('api:index')
+        etag = self.assertNotModified(self.guest_client, url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=ApiTests.user, text='Новый пост')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_detail_tracks_comments(self):
+        post = ApiTests.post
+        url = reverse('api:post_detail', kwargs={'post_id': post.pk})
+        index_etag = self.assertNotModified(
+            self.guest_client, reverse('api:index')
+        )
+        etag = self.assertNotModified(self.guest_client, url)
+        Comment.objects.create(post=post, author=ApiTests.reader, text='Да')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['comments_count'], 1)
+        response = self.guest_client.get(
+            reverse('api:index'), HTTP_IF_NONE_MATCH=index_etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_follow_feed(self):
+        url = reverse('api:follow_index')
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        etag = self.assertNotModified(self.reader_client, url)
+        Post.objects.create(author=ApiTests.user, text='Новый пост')
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['text'], 'Новый пост')
+
+    def test_post_detail_tracks_author_and_group(self):
+        """Переименование автора и правка группы меняют ETag поста."""
+        url = reverse('api:post_detail', kwargs={'post_id': ApiTests.post.pk})
+        etag = self.assertNotModified(self.guest_client, url)
+        ApiTests.user.first_name = 'Автор'
+        ApiTests.user.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        ApiTests.group.title = 'Новое название'
+        ApiTests.group.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,38 @@
+from django.test import TestCase
+
+from .. import benchmark, urls
+from ..models import Comment, Follow, Post, User
+
+
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = benchmark.seed(
+            users=5, groups=2, posts=30, comments=40, follows=10
+        )
+
+    def test_seed_volumes(self):
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertEqual(User.objects.count(), 6)
+        self.assertTrue(Follow.objects.filter(user=self.reader).exists())
+
+    def test_run_measures_every_url(self):
+        results = benchmark.run(repeat=2, user=self.reader)
+        self.assertEqual(
+            set(results), {pattern.name for pattern in urls.urlpatterns}
+        )
+        for metrics in results.values():
+            self.assertEqual(set(metrics), set(benchmark.METRICS))
+        self.assertGreater(results['post_detail']['queries'], 0)
+
+    def test_compare(self):
+        baseline = {'index': {
+            'p50_ms': 10, 'p95_ms': 20, 'queries': 3, 'alloc_kb': 100,
+        }}
+        same = {'index': dict(baseline['index'], p95_ms=25)}
+        self.assertEqual(benchmark.compare(same, baseline), [])
+        worse = {'index': dict(baseline['index'], queries=4, alloc_kb=200)}
+        regressions = benchmark.compare(worse, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('index: queries'))
@@ -0,0 +1,161 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+
+from ..models import Feed, FeedEntry, Follow, Post, User
+
+
+@override_settings(TASK_QUEUE_EAGER=True)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Старый пост'
+        )
+        Post.objects.create(author=cls.stranger, text='Чужой пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(FeedTests.reader)
+
+    def follow_index_posts(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_live_feed_without_built_timeline(self):
+        """Без собранной ленты работает живой запрос."""
+        Follow.objects.create(user=FeedTests.reader, author=FeedTests.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.follow_index_posts(), [FeedTests.old_post])
+
+    def test_built_timeline_follows_writes(self):
+        """Собранная лента обновляется при постах и подписках."""
+        call_command(
+            'build_feeds', FeedTests.reader.username, stdout=StringIO()
+        )
+        self.assertTrue(Feed.objects.filter(user=FeedTests.reader).exists())
+        self.assertEqual(self.follow_index_posts(), [])
+        Follow.objects.create(user=FeedTests.reader, author=FeedTests.author)
+        self.assertEqual(self.follow_index_posts(), [FeedTests.old_post])
+        new_post = Post.objects.create(
+            author=FeedTests.author, text='Новый пост'
+        )
+        self.assertEqual(
+            self.follow_index_posts(), [new_post, FeedTests.old_post]
+        )
+        Follow.objects.filter(
+            user=FeedTests.reader, author=FeedTests.author
+        ).delete()
+        self.assertEqual(self.follow_index_posts(), [])
+        self.assertFalse(
+            FeedEntry.objects.filter(user=FeedTests.reader).exists()
+        )
+
+    def test_build_feeds_backfills_existing_follows(self):
+        """Команда build_feeds переносит в ленту существующие подписки."""
+        Follow.objects.create(user=FeedTests.reader, author=FeedTests.author)
+        call_command('build_feeds', stdout=StringIO())
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user', 'post')),
+            [(FeedTests.reader.pk, FeedTests.old_post.pk)],
+        )
+
+    @override_settings(FEED_CELEBRITY_FOLLOWERS=2)
+    def test_celebrity_posts_merged_on_read(self):
+        """Посты популярных авторов не раскладываются по лентам,
+        а сливаются с лентой при чтении в порядке дат.
+        """
+        Follow.objects.create(user=FeedTests.reader, author=FeedTests.author)
+        Follow.objects.create(
+            user=FeedTests.stranger, author=FeedTests.author
+        )
+        Follow.objects.create(user=FeedTests.reader, author=FeedTests.stranger)
+        call_command(
+            'build_feeds', FeedTests.reader.username, stdout=StringIO()
+        )
+        celebrity_post = Post.objects.create(
+            author=FeedTests.author, text='Пост знаменитости'
+        )
+        ordinary_post = Post.objects.create(
+            author=FeedTests.stranger, text='Обычный пост'
+        )
+        self.assertFalse(
+            FeedEntry.objects.filter(post__author=FeedTests.author).exists()
+        )
+        self.assertTrue(
+            FeedEntry.objects.filter(post=ordinary_post).exists()
+        )
+        posts = self.follow_index_posts()
+        self.assertEqual(posts[:2], [ordinary_post, celebrity_post])
+        self.assertIn(FeedTests.old_post, posts)
+        self.assertEqual(
+            posts, sorted(posts, key=lambda post: post.pub_date, reverse=True)
+        )
+
+    @override_settings(FEED_CELEBRITY_FOLLOWERS=2)
+    def test_demoted_celebrity_posts_backfilled(self):
+        """Когда автор опускается ниже порога, его посты, написанные
+        в бытность популярным, остаются в ленте.
+        """
+        Follow.objects.create(user=FeedTests.reader, author=FeedTests.author)
+        Follow.objects.create(
+            user=FeedTests.stranger, author=FeedTests.author
+        )
+        call_command(
+            'build_feeds', FeedTests.reader.username, stdout=StringIO()
+        )
+        celebrity_post = Post.objects.create(
+            author=FeedTests.author, text='Пост знаменитости'
+        )
+        self.assertEqual(
+            self.follow_index_posts(), [celebrity_post, FeedTests.old_post]
+        )
+        Follow.objects.filter(
+            user=FeedTests.stranger, author=FeedTests.author
+        ).delete()
+        self.assertEqual(
+            self.follow_index_posts(), [celebrity_post, FeedTests.old_post]
+        )
+        self.assertTrue(FeedEntry.objects.filter(
+            user=FeedTests.reader, post=celebrity_post
+        ).exists())
+
+    @override_settings(FEED_CELEBRITY_FOLLOWERS=2, TASK_QUEUE_EAGER=False)
+    def test_backfill_queued_once(self):
+        """Раскладка постов опустившегося автора идёт задачей в очереди,
+        а не в запросе отписки, и повторная отписка её не дублирует.
+        """
+        Follow.objects.create(user=FeedTests.reader, author=FeedTests.author)
+        call_command(
+            'build_feeds', FeedTests.reader.username, stdout=StringIO()
+        )
+        for _ in range(2):
+            Follow.objects.create(
+                user=FeedTests.stranger, author=FeedTests.author
+            )
+            celebrity_post = Post.objects.create(
+                author=FeedTests.author, text='Пост знаменитости'
+            )
+            Follow.objects.filter(
+                user=FeedTests.stranger, author=FeedTests.author
+            ).delete()
+        self.assertFalse(FeedEntry.objects.filter(
+            user=FeedTests.reader, post=celebrity_post
+        ).exists())
+        backfill = Task.objects.filter(
+            dedup_key=f'backfill:{FeedTests.author.pk}'
+        )
+        self.assertEqual(backfill.count(), 1)
+        tasks.work('worker', 10)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=FeedTests.reader, post=celebrity_post
+        ).exists())
@@ -1,10 +1,12 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..forms import CommentForm, PostForm
 from ..models import Comment, Group, Post, User
@@ -12,7 +14,7 @@ from ..models import Comment, Group, Post, User
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASK_QUEUE_EAGER=True)
 class PostFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -75,10 +77,37 @@ class PostFormTests(TestCase):
                 author=PostFormTests.user,
                 text=form_data['text'],
                 group=form_data['group'],
-                image='posts/small.gif'
+                image__regex=r'^posts/[0-9a-f]{64}\.(jpg|webp)$',
             ).exists()
         )
 
+    def test_post_image_normalized(self):
+        """Картинка уменьшается, теряет метаданные и не дублируется."""
+        buffer = BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = 'Test camera'
+        Image.new('RGB', (4000, 1000), 'red').save(
+            buffer, 'PNG', exif=exif
+        )
+        images = []
+        for text in ('Первый пост', 'Второй пост'):
+            form = PostForm(
+                data={'text': text},
+                files={'image': SimpleUploadedFile(
+                    'big.png', buffer.getvalue(), 'image/png'
+                )},
+                instance=Post(author=PostFormTests.user),
+            )
+            self.assertTrue(form.is_valid(), form.errors)
+            images.append(form.save().image)
+        self.assertEqual(images[0].name, images[1].name)
+        self.assertLess(images[0].size, len(buffer.getvalue()))
+        with Image.open(images[0]) as image:
+            max_width, max_height = settings.POST_IMAGE_MAX_SIZE
+            self.assertLessEqual(image.width, max_width)
+            self.assertLessEqual(image.height, max_height)
+            self.assertFalse(image.getexif())
+
     def test_post_edit_form(self):
         """Валидная форма редактирует запись в Post."""
         post = Post.objects.create(
@@ -0,0 +1,80 @@
+import re
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..feed import build_feed
+from ..models import Comment, Follow, Group, Post, User
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)$')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(15):
+            cls.post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}'
+            )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        build_feed(cls.reader)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(QueryPlanTests.reader)
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql.replace('%', '%%'))
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент, профиля и комментариев идут по индексам,
+        без полного просмотра таблиц и сортировки во временном B-дереве.
+        """
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse(
+                'posts:group_posts',
+                kwargs={'slug': QueryPlanTests.group.slug}
+            ),
+            reverse(
+                'posts:profile',
+                kwargs={'username': QueryPlanTests.author.username}
+            ),
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': QueryPlanTests.post.pk}
+            ),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                self.client.get(url)
+            for query in context.captured_queries:
+                if '"posts_' not in query['sql']:
+                    continue
+                for step in self.query_plan(query['sql']):
+                    with self.subTest(url=url, step=step):
+                        self.assertNotIn('TEMP B-TREE', step)
+                        scan = FULL_SCAN.match(step)
+                        self.assertFalse(
+                            scan and scan['table'].startswith('posts_'),
+                            query['sql'],
+                        )
@@ -1,7 +1,11 @@
+from io import StringIO
+
 from django.conf import settings
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
 
-from ..models import Group, Post, User
+from ..models import Comment, Follow, Group, Post, User, UserCounters
 
 
 class PostModelTest(TestCase):
@@ -29,3 +33,118 @@ class PostModelTest(TestCase):
         group = PostModelTest.group
         expected_object_name = group.title
         self.assertEqual(expected_object_name, str(group))
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group2 = Group.objects.create(
+            title='Вторая группа',
+            slug='test2-slug',
+            description='Тестовое описание',
+        )
+
+    def assertCounters(self, **expected):
+        user_counters = UserCounters.objects.get(user=CountersTest.user)
+        reader_counters = UserCounters.objects.get(user=CountersTest.reader)
+        actual = {
+            'posts': user_counters.posts_count,
+            'followers': user_counters.followers_count,
+            'following': reader_counters.following_count,
+            'group': Group.objects.get(pk=CountersTest.group.pk).posts_count,
+            'group2': Group.objects.get(
+                pk=CountersTest.group2.pk
+            ).posts_count,
+        }
+        self.assertEqual(actual, expected)
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании, правке и удалении записей."""
+        post = Post.objects.create(
+            author=CountersTest.user,
+            group=CountersTest.group,
+            text='Тестовый пост',
+        )
+        follow = Follow.objects.create(
+            user=CountersTest.reader, author=CountersTest.user
+        )
+        self.assertCounters(
+            posts=1, followers=1, following=1, group=1, group2=0
+        )
+        comment = Comment.objects.create(
+            post=post, author=CountersTest.reader, text='Коммент'
+        )
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+        post.group = CountersTest.group2
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+        self.assertCounters(
+            posts=1, followers=1, following=1, group=0, group2=1
+        )
+        comment.delete()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 0)
+        follow.delete()
+        post.delete()
+        self.assertCounters(
+            posts=0, followers=0, following=0, group=0, group2=0
+        )
+
+    def test_recount_repairs_drift(self):
+        """Команда recount чинит разъехавшиеся счётчики."""
+        Post.objects.create(
+            author=CountersTest.user,
+            group=CountersTest.group,
+            text='Тестовый пост',
+        )
+        Follow.objects.create(
+            user=CountersTest.reader, author=CountersTest.user
+        )
+        UserCounters.objects.update(
+            posts_count=7, followers_count=7, following_count=7
+        )
+        Group.objects.update(posts_count=7)
+        call_command('recount', stdout=StringIO())
+        self.assertCounters(
+            posts=1, followers=1, following=1, group=1, group2=0
+        )
+
+    def test_drifted_counter_not_below_zero(self):
+        """Удаление не падает, если счётчик уже обнулился."""
+        post = Post.objects.create(
+            author=CountersTest.user,
+            group=CountersTest.group,
+            text='Тестовый пост',
+        )
+        UserCounters.objects.update(posts_count=0)
+        Group.objects.update(posts_count=0)
+        post.delete()
+        self.assertCounters(
+            posts=0, followers=0, following=0, group=0, group2=0
+        )
+
+    def test_missing_counters_created_on_read(self):
+        """Строка счётчиков, которой нет после loaddata, создаётся
+        при первом чтении профиля.
+        """
+        post = Post.objects.create(
+            author=CountersTest.user, text='Тестовый пост'
+        )
+        UserCounters.objects.filter(user=CountersTest.user).delete()
+        client = Client()
+        for url in (
+            reverse('posts:profile', args=(CountersTest.user.username,)),
+            reverse('posts:post_detail', args=(post.pk,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 200)
+        self.assertEqual(
+            UserCounters.objects.get(user=CountersTest.user).posts_count, 1
+        )
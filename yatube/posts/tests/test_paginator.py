@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, User
+from ..utils import WindowedPaginator, estimate_count
+
+POSTS = 30
+
+
+@override_settings(NUM_PAGE=1, PAGINATOR_WINDOW=2)
+class WindowedPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {number}')
+            for number in range(POSTS)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_window_links(self):
+        response = self.client.get(reverse('posts:index'), {'page': 10})
+        page_obj = response.context['page_obj']
+        self.assertEqual(list(page_obj.window), [8, 9, 10, 11, 12])
+        for number in (1, 8, 12, POSTS):
+            self.assertContains(response, f'page={number}"')
+        for number in (2, 7, 13, POSTS - 1):
+            self.assertNotContains(response, f'page={number}"')
+
+    def test_window_at_edges(self):
+        paginator = WindowedPaginator(Post.objects.all(), 1)
+        self.assertEqual(list(paginator.page(1).window), [1, 2, 3])
+        self.assertEqual(
+            list(paginator.page(POSTS).window), [POSTS - 2, POSTS - 1, POSTS]
+        )
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            count = WindowedPaginator(Post.objects.all(), 1).count
+        counting = [
+            query for query in context.captured_queries
+            if 'COUNT(' in query['sql'].upper()
+        ]
+        return count, len(counting)
+
+    def test_count_cached_until_posts_change(self):
+        self.assertEqual(self.count_queries(), (POSTS, 1))
+        self.assertEqual(self.count_queries(), (POSTS, 0))
+        Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(self.count_queries(), (POSTS + 1, 1))
+
+    def test_count_passed_explicitly(self):
+        paginator = WindowedPaginator(Post.objects.all(), 1, count=5)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.num_pages, 5)
+
+    @override_settings(PAGINATOR_ESTIMATE_ROWS=10)
+    def test_estimate_from_sqlite_stat1(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimate_count(Post.objects.all()), POSTS)
+        self.assertIsNone(estimate_count(Post.objects.filter(pk=1)))
+        self.assertEqual(self.count_queries(), (POSTS, 0))
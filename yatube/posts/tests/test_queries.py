@@ -0,0 +1,112 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..counters import recount
+from ..feed import build_feed
+from ..models import Comment, Follow, Group, Post, User
+from .utils import QueryBudgetMixin
+
+POSTS = 12
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Число запросов страниц не растёт вместе с числом постов
+    и комментариев на странице.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        authors = [
+            User.objects.create_user(username=f'author{i}')
+            for i in range(POSTS)
+        ]
+        for author in authors:
+            Post.objects.create(
+                author=author, group=cls.group, text=f'Пост {author}'
+            )
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.author = authors[0]
+        cls.post = Post.objects.filter(author=cls.author).get()
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Ещё пост {i}')
+            for i in range(POSTS)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=author, text=f'От {author}')
+            for author in authors
+        )
+        recount()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_read_pages(self):
+        budgets = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_posts', args=(self.group.slug,)): 5,
+            reverse('posts:profile', args=(self.author.username,)): 6,
+            reverse('posts:post_detail', args=(self.post.pk,)): 4,
+            reverse('posts:post_comments', args=(self.post.pk,)): 2,
+            reverse('posts:follow_index'): 5,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(self.client, url, budget)
+
+    def test_follow_index_with_built_feed(self):
+        build_feed(self.reader)
+        self.assertQueryBudget(
+            self.client, reverse('posts:follow_index'), 6
+        )
+
+    def test_create_and_edit_forms(self):
+        budgets = {
+            reverse('posts:post_create'): 5,
+            reverse('posts:post_edit', args=(self.post.pk,)): 6,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(self.author_client, url, budget)
+
+    def test_forms_render_outside_transaction(self):
+        """GET формы не открывает транзакцию, иначе BEGIN IMMEDIATE
+        держал бы блокировку записи SQLite, пока рисуется шаблон.
+        """
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        for url in (
+            reverse('posts:post_create'),
+            reverse('posts:post_edit', args=(self.post.pk,)),
+        ):
+            with self.subTest(url=url), connection.execute_wrapper(record):
+                self.author_client.get(url)
+        self.assertFalse([
+            sql for sql in statements if sql.startswith('SAVEPOINT')
+        ])
+
+    def test_create_and_edit_submit(self):
+        data = {'text': 'Новый текст', 'group': self.group.pk}
+        budgets = {
+            reverse('posts:post_create'): 14,
+            reverse('posts:post_edit', args=(self.post.pk,)): 11,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                queries = self.count_queries(
+                    self.author_client, url, data, method='post'
+                )
+                self.assertLessEqual(queries, budget)
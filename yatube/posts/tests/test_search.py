@@ -0,0 +1,127 @@
+import sqlite3
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post, User
+from ..search import search_posts
+from ..stemmer import stem
+
+
+class StemmerTest(TestCase):
+    def test_stem(self):
+        cases = {
+            'котики': 'котик',
+            'кошками': 'кошк',
+            'красивая': 'красив',
+            'важнейший': 'важн',
+            'ёлка': 'елк',
+            'Django': 'django',
+        }
+        for word, expected in cases.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+
+def call_rebuild():
+    call_command('rebuild_search_index', stdout=StringIO())
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.cats = Post.objects.create(
+            author=cls.user, text='Котики и кошки: котик спит, котики едят.'
+        )
+        cls.cat = Post.objects.create(
+            author=cls.user, text='Про котика и собаку'
+        )
+        cls.dog = Post.objects.create(author=cls.user, text='Собаки лают')
+
+    def search(self, query):
+        results = search_posts(query)
+        return results.count(), list(results[:settings.NUM_PAGE])
+
+    def assertSearch(self):
+        self.assertEqual(
+            self.search('котики'), (2, [SearchTest.cats, SearchTest.cat])
+        )
+        self.assertEqual(self.search('КОТИК собаки'), (1, [SearchTest.cat]))
+        self.assertEqual(self.search('попугай'), (0, []))
+        self.assertEqual(self.search(' ,. '), (0, []))
+
+    @override_settings(SEARCH_ENGINE='fts5')
+    def test_fts5_engine(self):
+        """Поиск со стеммингом и ранжированием по частоте слова."""
+        self.assertSearch()
+
+    def test_python_engine(self):
+        with override_settings(SEARCH_ENGINE='python'):
+            call_rebuild()
+            self.assertSearch()
+
+    def test_index_follows_edits(self):
+        for engine in ('fts5', 'python'):
+            with self.subTest(engine=engine), override_settings(
+                SEARCH_ENGINE=engine
+            ):
+                call_rebuild()
+                post = Post.objects.create(
+                    author=SearchTest.user, text='Попугай'
+                )
+                self.assertEqual(self.search('попугаи'), (1, [post]))
+                post.text = 'Канарейка'
+                post.save()
+                self.assertEqual(self.search('попугай'), (0, []))
+                post.delete()
+                self.assertEqual(self.search('канарейка'), (0, []))
+
+    def test_search_view_paginates(self):
+        Post.objects.bulk_create(
+            Post(author=SearchTest.user, text=f'Котики {i}')
+            for i in range(settings.NUM_PAGE)
+        )
+        call_rebuild()
+        url = reverse('posts:search')
+        response = Client().get(url, {'q': 'котики'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, settings.NUM_PAGE + 2)
+        self.assertEqual(len(page_obj), settings.NUM_PAGE)
+        self.assertContains(response, 'page=2')
+        self.assertEqual(
+            response.context['page_query'],
+            'q=%D0%BA%D0%BE%D1%82%D0%B8%D0%BA%D0%B8&',
+        )
+        response = Client().get(url, {'q': 'котики', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_admin_search_many_matches(self):
+        """Поиск в админке не упирается в лимит переменных SQLite."""
+        Post.objects.bulk_create(
+            Post(author=SearchTest.user, text=f'Котики {i}')
+            for i in range(20)
+        )
+        admin = User.objects.create_superuser(
+            'admin', 'admin@yatube.ru', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:posts_post_changelist')
+        limit = sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER
+        for engine in ('fts5', 'python'):
+            with self.subTest(engine=engine), override_settings(
+                SEARCH_ENGINE=engine
+            ):
+                call_rebuild()
+                previous = connection.connection.setlimit(limit, 10)
+                try:
+                    response = client.get(url, {'q': 'котики'})
+                finally:
+                    connection.connection.setlimit(limit, previous)
+                self.assertEqual(response.context['cl'].result_count, 22)
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import TransactionTestCase, override_settings
+
+from ..images import release_image
+from ..models import Post, User
+from ..storage import post_image_storage
+from .utils import make_image
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASK_QUEUE_EAGER=True)
+class ContentAddressedStorageTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+
+    def create_post(self, image):
+        return Post.objects.create(
+            author=self.user, text='Пост с картинкой', image=image
+        )
+
+    def test_duplicate_upload_shares_file(self):
+        """Одинаковые картинки хранятся одним файлом с общим превью."""
+        first = self.create_post(make_image('one.png'))
+        second = self.create_post(make_image('two.png'))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^posts/[0-9a-f]{64}\.png$')
+        self.assertEqual(first.thumbnail.name, second.thumbnail.name)
+        self.assertEqual(
+            len(os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'posts'))), 2
+        )
+
+    def test_file_deleted_with_last_reference(self):
+        first = self.create_post(make_image())
+        second = self.create_post(make_image())
+        first.refresh_from_db()
+        image_name, thumbnail_name = first.image.name, first.thumbnail.name
+        first.delete()
+        self.assertTrue(post_image_storage.exists(image_name))
+        second.delete()
+        self.assertFalse(post_image_storage.exists(image_name))
+        self.assertFalse(default_storage.exists(thumbnail_name))
+
+    def test_replaced_image_released(self):
+        post = self.create_post(make_image())
+        image_name = post.image.name
+        post.image = make_image(size=(20, 40))
+        post.save()
+        self.assertNotEqual(post.image.name, image_name)
+        self.assertFalse(post_image_storage.exists(image_name))
+        self.assertTrue(post_image_storage.exists(post.image.name))
+
+    def test_concurrent_duplicate_save(self):
+        """Если файл появился между проверкой и записью, сохранение
+        отдаёт готовое имя, а не пытается подобрать другое.
+        """
+        name = post_image_storage.save('posts/pic.png', make_image())
+        with mock.patch.object(
+            post_image_storage, 'exists', return_value=False
+        ):
+            self.assertEqual(
+                post_image_storage.save('posts/pic.png', make_image()), name
+            )
+        self.assertEqual(
+            os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'posts')),
+            [os.path.basename(name)],
+        )
+
+    def test_reused_file_kept_until_confirmed(self):
+        """Файл, который взяла ещё не сохранённая загрузка, не удаляется."""
+        post = self.create_post(make_image())
+        image_name = post.image.name
+        self.assertEqual(
+            post_image_storage.save('posts/pic.png', make_image()),
+            image_name,
+        )
+        post.delete()
+        self.assertTrue(post_image_storage.exists(image_name))
+        post_image_storage.confirm_reuse(image_name)
+        release_image(image_name)
+        self.assertFalse(post_image_storage.exists(image_name))
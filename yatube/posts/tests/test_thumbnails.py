@@ -0,0 +1,83 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post, User
+from ..thumbnails import generate_thumbnail
+from .utils import make_image
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASK_QUEUE_EAGER=True)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            author=ThumbnailTests.user,
+            text='Пост с картинкой',
+            image=make_image(),
+        )
+
+    def test_generate_thumbnail(self):
+        """Превью сохраняется в посте и попадает в карточку, а ленты
+        перестают отвечать 304 по старому ETag.
+        """
+        self.assertFalse(self.post.thumbnail)
+        client = Client()
+        etag = client.get(reverse('posts:index'))['ETag']
+        name = generate_thumbnail(self.post.pk, self.post.image.name)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail.name, name)
+        with Image.open(self.post.thumbnail) as thumbnail:
+            self.assertEqual(thumbnail.size, settings.POST_THUMBNAIL_SIZE)
+            self.assertEqual(thumbnail.format, 'JPEG')
+        response = client.get(reverse('posts:index'), HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, self.post.thumbnail.url)
+
+    def test_changed_image_drops_thumbnail(self):
+        """Новая картинка сбрасывает превью, а старое не записывается."""
+        old_name = self.post.image.name
+        generate_thumbnail(self.post.pk, old_name)
+        self.post.refresh_from_db()
+        self.post.image = make_image('other.png', size=(20, 40))
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.thumbnail)
+        self.assertIsNone(generate_thumbnail(self.post.pk, old_name))
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.thumbnail)
+
+    def test_regenerate_all(self):
+        """--all пересоздаёт уже готовое превью с новыми настройками."""
+        name = generate_thumbnail(self.post.pk, self.post.image.name)
+        with open(default_storage.path(name), 'rb') as thumbnail:
+            before = thumbnail.read()
+        with self.settings(POST_THUMBNAIL_QUALITY=10):
+            call_command('generate_thumbnails', '--all', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail.name, name)
+        with open(default_storage.path(name), 'rb') as thumbnail:
+            self.assertNotEqual(thumbnail.read(), before)
+
+    def test_original_image_until_thumbnail_ready(self):
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertContains(response, self.post.image.url)
@@ -0,0 +1,100 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, User, UserCounters
+from ..search import search_posts
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Котики, "кавычки"\nи строки',
+        )
+        Post.objects.create(author=cls.reader, text='Второй пост')
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.pub_date = timezone.now() - timedelta(days=30)
+        Post.objects.filter(pk=cls.post.pk).update(pub_date=cls.pub_date)
+
+    def export(self, file_format):
+        out = StringIO()
+        call_command(
+            'export_posts', format=file_format, stdout=out, stderr=StringIO()
+        )
+        return out.getvalue()
+
+    def reimport(self, dump, file_format):
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        User.objects.exclude(pk=TransferTest.user.pk).delete()
+        path = self.write_dump(dump, file_format)
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+
+    def write_dump(self, dump, file_format):
+        handle, path = tempfile.mkstemp(suffix=f'.{file_format}')
+        with os.fdopen(handle, 'w', encoding='utf-8', newline='') as stream:
+            stream.write(dump)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_round_trip(self):
+        """Выгрузка загружается обратно вместе с датами и счётчиками."""
+        for file_format in ('jsonl', 'csv'):
+            with self.subTest(file_format=file_format):
+                self.reimport(self.export(file_format), file_format)
+                post = Post.objects.get(text='Котики, "кавычки"\nи строки')
+                self.assertEqual(post.pub_date, TransferTest.pub_date)
+                self.assertEqual(post.group, TransferTest.group)
+                self.assertEqual(post.comments_count, 1)
+                self.assertEqual(
+                    post.comments.get().author.username, 'reader'
+                )
+                self.assertTrue(Follow.objects.filter(
+                    user__username='reader', author=TransferTest.user
+                ).exists())
+                self.assertEqual(
+                    UserCounters.objects.get(
+                        user=TransferTest.user
+                    ).followers_count,
+                    1,
+                )
+                self.assertEqual(search_posts('котик').count(), 1)
+
+    def test_malformed_lines_skipped(self):
+        """Битые строки JSONL пропускаются, остальное загружается,
+        а комментарии находят посты из прошлых пачек.
+        """
+        lines = self.export('jsonl').splitlines()
+        lines.insert(1, '{"type": "post", "text": ')
+        lines.insert(2, '[1, 2]')
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        path = self.write_dump('\n'.join(lines) + '\n', 'jsonl')
+        out = StringIO()
+        call_command('import_posts', path, batch_size=2, stdout=out)
+        self.assertIn('пропущено: 2', out.getvalue())
+        post = Post.objects.get(text='Котики, "кавычки"\nи строки')
+        self.assertEqual(post.comments.count(), 1)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(
+            UserCounters.objects.get(user=TransferTest.user).posts_count, 1
+        )
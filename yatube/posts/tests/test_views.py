@@ -9,12 +9,15 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Follow, Group, Post, User
+from ..cards import card_key
+from ..counters import recount
+from ..models import Comment, Follow, Group, Post, User
+from ..utils import encode_cursor
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASK_QUEUE_EAGER=True)
 class PostPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -122,7 +125,9 @@ class PostPagesTests(TestCase):
                     first_object.author.username,
                     PostPagesTests.post.author.username
                 )
-                self.assertEqual(first_object.image, 'posts/small.gif')
+                self.assertEqual(
+                    first_object.image, PostPagesTests.post.image.name
+                )
 
     def test_private_pages_show_correct_context(self):
         """Тест контекста всех приватных страниц"""
@@ -163,17 +168,20 @@ class PostPagesTests(TestCase):
         self.assertNotIn(PostPagesTests.post, object)
 
     def test_cache_index(self):
-        """Проверка хранения и очищения кэша для index."""
+        """Блок ленты index кэшируется и сбрасывается при новом посте."""
+        guest_client = Client()
         response = self.authorized_client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            response_cached = guest_client.get(reverse('posts:index'))
+        self.assertContains(response_cached, PostPagesTests.post.text)
+        self.assertContains(response, 'Пользователь: tanya')
+        self.assertNotContains(response_cached, 'Пользователь: tanya')
         Post.objects.create(
             text='Новейший текст',
             author=self.user,
         )
-        response_old = self.authorized_client.get(reverse('posts:index'))
-        self.assertEqual(response_old.content, response.content)
-        cache.clear()
-        response_new = self.authorized_client.get(reverse('posts:index'))
-        self.assertNotEqual(response_old.content, response_new.content)
+        response_new = guest_client.get(reverse('posts:index'))
+        self.assertContains(response_new, 'Новейший текст')
 
 
 class PaginatorViewsTest(TestCase):
@@ -196,6 +204,7 @@ class PaginatorViewsTest(TestCase):
                 for i in range(settings.NUM_PAGE + settings.NUM_PAGE2)
             ]
         )
+        recount()
         cls.URLS = [
             reverse('posts:index'),
             reverse('posts:group_posts', kwargs={'slug': cls.group.slug}),
@@ -222,6 +231,50 @@ class PaginatorViewsTest(TestCase):
                             len(response.context['page_obj']), numpages
                         )
 
+    def test_cursor_paginator(self):
+        """Курсорная пагинация не теряет и не дублирует посты
+        при появлении новых записей.
+        """
+        for reverse_name in PaginatorViewsTest.URLS:
+            with self.subTest(reverse_name=reverse_name):
+                first_page = self.authorized_client.get(
+                    reverse_name
+                ).context['page_obj']
+                self.assertEqual(len(first_page), settings.NUM_PAGE)
+                self.assertFalse(first_page.has_previous())
+                Post.objects.create(
+                    author=PaginatorViewsTest.user,
+                    group=PaginatorViewsTest.group,
+                    text='Новый пост',
+                )
+                second_page = self.authorized_client.get(
+                    reverse_name, {'cursor': first_page.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(len(second_page), settings.NUM_PAGE2)
+                self.assertFalse(second_page.has_next())
+                self.assertFalse(
+                    set(first_page.object_list)
+                    & set(second_page.object_list)
+                )
+                previous_page = self.authorized_client.get(
+                    reverse_name, {'cursor': second_page.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    list(previous_page.object_list),
+                    list(first_page.object_list),
+                )
+                self.assertTrue(previous_page.has_previous())
+                Post.objects.filter(text='Новый пост').delete()
+
+    def test_cursor_paginator_bad_token(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'cursor': 'broken'}
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), settings.NUM_PAGE
+        )
+
 
 class FollowViewsTest(TestCase):
     @classmethod
@@ -291,3 +344,196 @@ class FollowViewsTest(TestCase):
         self.authorized_client.get(FollowViewsTest.reverse_follow_user1)
         follow_count = Follow.objects.count()
         self.assertEqual(follow_count, 0)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='tanya', first_name='Таня'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Исходный текст'
+        )
+        cls.url = reverse('posts:group_posts', kwargs={'slug': 'test-slug'})
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_card_cached_and_invalidated(self):
+        """Карточка поста кэшируется и сбрасывается при правке поста
+        и смене имени автора.
+        """
+        post = PostCardCacheTest.post
+        self.guest_client.get(PostCardCacheTest.url)
+        self.assertIn(
+            'Исходный текст', cache.get(card_key(post.pk, True))
+        )
+        post.text = 'Новый текст'
+        post.save()
+        self.assertIsNone(cache.get(card_key(post.pk, True)))
+        response = self.guest_client.get(PostCardCacheTest.url)
+        self.assertContains(response, 'Новый текст')
+        author = PostCardCacheTest.user
+        author.first_name = 'Татьяна'
+        author.save()
+        response = self.guest_client.get(PostCardCacheTest.url)
+        self.assertContains(response, 'Татьяна')
+
+    def test_deleted_group_drops_cards(self):
+        """После удаления группы карточки не ссылаются на неё, а старый
+        ETag ленты больше не даёт 304.
+        """
+        index_url = reverse('posts:index')
+        response = self.guest_client.get(index_url)
+        self.assertContains(response, PostCardCacheTest.url)
+        PostCardCacheTest.group.delete()
+        response = self.guest_client.get(
+            index_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotContains(response, PostCardCacheTest.url)
+
+    def test_cached_cards_skip_rendering(self):
+        """Повторная страница собирается из кэша без рендеринга карточек."""
+        self.guest_client.get(PostCardCacheTest.url)
+        response = self.guest_client.get(PostCardCacheTest.url)
+        self.assertTemplateNotUsed(response, 'posts/includes/post_card.html')
+        self.assertContains(response, 'Исходный текст')
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(settings.NUM_COMMENTS + 5)
+        )
+        cls.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+        cls.comments_url = reverse(
+            'posts:post_comments', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_post_detail_shows_first_comments(self):
+        response = self.guest_client.get(CommentPaginationTest.detail_url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.NUM_COMMENTS)
+        self.assertEqual(comments[0].text, 'Комментарий 0')
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, 'Показать ещё')
+
+    def test_load_more_comments(self):
+        """JSON отдаёт следующую порцию, после последней — пустой список."""
+        response = self.guest_client.get(CommentPaginationTest.detail_url)
+        cursor = response.context['comments'].next_cursor
+        data = self.guest_client.get(
+            CommentPaginationTest.comments_url, {'cursor': cursor}
+        ).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            [f'Комментарий {i}' for i in range(
+                settings.NUM_COMMENTS, settings.NUM_COMMENTS + 5
+            )],
+        )
+        self.assertIsNone(data['next_cursor'])
+        last = Comment.objects.order_by('pub_date', 'pk').last()
+        data = self.guest_client.get(
+            CommentPaginationTest.comments_url,
+            {'cursor': encode_cursor(last)},
+        ).json()
+        self.assertEqual(data, {'comments': [], 'next_cursor': None})
+
+    def test_newest_comments_first(self):
+        data = self.guest_client.get(
+            CommentPaginationTest.comments_url, {'order': 'newest'}
+        ).json()
+        self.assertEqual(
+            data['comments'][0]['text'],
+            f'Комментарий {settings.NUM_COMMENTS + 4}',
+        )
+        self.assertEqual(len(data['comments']), settings.NUM_COMMENTS)
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(ConditionalGetTest.reader)
+
+    def get_etags(self, client):
+        return {url: client.get(url)['ETag'] for url in self.urls}
+
+    def test_not_modified_until_post_changes(self):
+        """Пока посты не менялись, ленты отвечают 304."""
+        etags = self.get_etags(self.guest_client)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                self.urls[0], HTTP_IF_NONE_MATCH=etags[self.urls[0]]
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+        post = ConditionalGetTest.post
+        post.text = 'Новый текст'
+        post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertContains(response, 'Новый текст')
+
+    def test_etag_depends_on_user_and_follow(self):
+        guest_etags = self.get_etags(self.guest_client)
+        reader_etags = self.get_etags(self.reader_client)
+        for url in self.urls:
+            self.assertNotEqual(guest_etags[url], reader_etags[url])
+        Follow.objects.create(
+            user=ConditionalGetTest.reader, author=ConditionalGetTest.user
+        )
+        profile_url = self.urls[2]
+        response = self.reader_client.get(
+            profile_url, HTTP_IF_NONE_MATCH=reader_etags[profile_url]
+        )
+        self.assertContains(response, 'Отписаться')
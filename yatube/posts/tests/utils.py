@@ -0,0 +1,48 @@
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from PIL import Image
+
+from ..benchmark import QueryCounter
+
+
+def make_image(name='pic.png', size=(40, 20)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+class QueryBudgetMixin:
+    """Проверки числа SQL-запросов, которые делает страница.
+
+    Кэш очищается перед каждым запросом, чтобы считать запросы
+    холодной страницы, а не ответа из кэша.
+    """
+
+    def count_queries(self, client, url, data=None, method='get'):
+        cache.clear()
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            getattr(client, method)(url, data)
+        return counter.count
+
+    def assertQueryBudget(
+        self, client, url, budget, page_sizes=(1, 10), data=None
+    ):
+        """Запросов не больше budget, и их число не зависит от размера
+        страниц NUM_PAGE и NUM_COMMENTS.
+        """
+        counts = {}
+        for size in page_sizes:
+            with self.settings(NUM_PAGE=size, NUM_COMMENTS=size):
+                counts[size] = self.count_queries(client, url, data)
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f'{url}: число запросов растёт с размером страницы {counts}',
+        )
+        self.assertLessEqual(
+            max(counts.values()), budget,
+            f'{url}: запросов {max(counts.values())}, бюджет {budget}',
+        )
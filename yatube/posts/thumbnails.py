@@ -0,0 +1,91 @@
+import logging
+import os
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from core import metrics
+
+from . import cards, page_cache, stamps
+from .models import Post
+from .storage import post_image_storage
+
+logger = logging.getLogger(__name__)
+
+
+def thumbnail_name(image_name):
+    width, height = settings.POST_THUMBNAIL_SIZE
+    base = os.path.splitext(os.path.basename(image_name))[0]
+    return f'posts/thumbs/{base}_{width}x{height}.jpg'
+
+
+def render_thumbnail(image_file):
+    """JPEG-превью: кадрирование по центру с увеличением до размера."""
+    image = Image.open(image_file)
+    image = ImageOps.fit(
+        image.convert('RGB'), settings.POST_THUMBNAIL_SIZE, Image.LANCZOS
+    )
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        'JPEG',
+        quality=settings.POST_THUMBNAIL_QUALITY,
+        optimize=True,
+        progressive=True,
+    )
+    return ContentFile(buffer.getvalue())
+
+
+def generate_thumbnail(post_id, image_name, force=False):
+    """Готовит превью картинки поста и сохраняет его в посте.
+
+    Картинки хранятся по хэшу содержимого, поэтому превью уже
+    загруженной кем-то картинки не рендерится повторно; force
+    пересоздаёт его, например после смены POST_THUMBNAIL_QUALITY.
+    """
+    name = thumbnail_name(image_name)
+    if force or not default_storage.exists(name):
+        started = time.perf_counter()
+        try:
+            with post_image_storage.open(image_name) as image_file:
+                content = render_thumbnail(image_file)
+        except (OSError, SuspiciousFileOperation, ValueError):
+            logger.warning('Не удалось подготовить превью %s', image_name)
+            return None
+        metrics.observe(
+            'yatube_thumbnail_seconds', time.perf_counter() - started
+        )
+        if force:
+            default_storage.delete(name)
+        name = default_storage.save(name, content)
+    updated = Post.objects.filter(pk=post_id, image=image_name).update(
+        thumbnail=name
+    )
+    if not updated:
+        if not Post.objects.filter(image=image_name).exists():
+            default_storage.delete(name)
+        return None
+    cards.invalidate_cards([post_id])
+    page_cache.bump_generation()
+    post = Post.objects.filter(pk=post_id).only(
+        'author_id', 'group_id'
+    ).first()
+    if post is not None:
+        stamps.touch_post(post)
+    return name
+
+
+def schedule_thumbnail(post):
+    """Ставит подготовку превью в очередь задач после коммита."""
+    from .tasks import generate_post_thumbnail
+
+    post_id, image_name = post.pk, post.image.name
+    transaction.on_commit(lambda: generate_post_thumbnail.delay(
+        post_id, image_name, dedup_key=f'thumbnail:{post_id}:{image_name}'
+    ))
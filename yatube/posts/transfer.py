@@ -0,0 +1,320 @@
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, feed, page_cache, search, stamps
+from .models import Comment, Feed, Follow, Group, Post, User
+
+FIELDS = (
+    'type', 'id', 'post', 'user', 'author', 'group', 'text', 'pub_date',
+    'image',
+)
+TYPES = ('post', 'comment', 'follow')
+FORMATS = ('jsonl', 'csv')
+POST_IDS_TABLE = 'posts_import_post_ids'
+
+
+def export_rows(types=TYPES, chunk_size=2000):
+    """Строки выгрузки: сначала посты, затем комментарии и подписки.
+
+    Имена авторов и слаги групп приходят из JOIN, записи читаются
+    из базы порциями по chunk_size.
+    """
+    if 'post' in types:
+        posts = Post.objects.order_by('pk').values_list(
+            'pk', 'author__username', 'group__slug', 'text', 'pub_date',
+            'image',
+        )
+        for pk, author, group, text, pub_date, image in posts.iterator(
+            chunk_size
+        ):
+            yield {
+                'type': 'post', 'id': pk, 'author': author, 'group': group,
+                'text': text, 'pub_date': pub_date.isoformat(),
+                'image': image,
+            }
+    if 'comment' in types:
+        comments = Comment.objects.order_by('pk').values_list(
+            'pk', 'post_id', 'author__username', 'text', 'pub_date'
+        )
+        for pk, post_id, author, text, pub_date in comments.iterator(
+            chunk_size
+        ):
+            yield {
+                'type': 'comment', 'id': pk, 'post': post_id,
+                'author': author, 'text': text,
+                'pub_date': pub_date.isoformat(),
+            }
+    if 'follow' in types:
+        follows = Follow.objects.order_by('pk').values_list(
+            'user__username', 'author__username'
+        )
+        for user, author in follows.iterator(chunk_size):
+            yield {'type': 'follow', 'user': user, 'author': author}
+
+
+def write_rows(rows, stream, file_format):
+    """Пишет строки в поток построчно; возвращает их число."""
+    written = 0
+    if file_format == 'csv':
+        writer = csv.DictWriter(stream, FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+        return written
+    for row in rows:
+        stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+        written += 1
+    return written
+
+
+def read_rows(stream, file_format):
+    """Читает строки из потока по одной; вместо нечитаемой строки
+    JSONL отдаёт None, чтобы загрузка пропустила её и пошла дальше.
+    """
+    if file_format == 'csv':
+        for row in csv.DictReader(stream):
+            yield {key: value for key, value in row.items() if value != ''}
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def keep_pub_date():
+    """Отключает auto_now_add, чтобы bulk_create сохранил даты из файла."""
+    fields = [
+        model._meta.get_field('pub_date') for model in (Post, Comment)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    """Загрузка постов, комментариев и подписок пачками через bulk_create.
+
+    Авторы и группы ищутся в словарях, заполненных один раз; новым
+    постам и комментариям id выдаются заранее. Соответствие id поста
+    в файле и в базе пишется во временную таблицу POST_IDS_TABLE,
+    откуда комментарии каждой пачки находят свои посты, — память
+    не растёт с размером файла. Счётчики, ленты и метки обновляются
+    один раз в конце, в finish().
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE IF NOT EXISTS {POST_IDS_TABLE} '
+                f'(file_id VARCHAR(64) PRIMARY KEY, post_id INTEGER NOT NULL)'
+            )
+            cursor.execute(f'DELETE FROM {POST_IDS_TABLE}')
+        self.authors = set()
+        self.group_ids = set()
+        self.readers = set()
+        self.created = dict.fromkeys(TYPES, 0)
+        self.skipped = 0
+
+    def user_id(self, username):
+        if not username:
+            return None
+        if username not in self.users:
+            user = User(username=username)
+            user.set_unusable_password()
+            user.save()
+            self.users[username] = user.pk
+        return self.users[username]
+
+    def group_id(self, slug):
+        if not slug:
+            return None
+        if slug not in self.groups:
+            self.groups[slug] = Group.objects.create(
+                title=slug, slug=slug, description=''
+            ).pk
+        return self.groups[slug]
+
+    def run(self, rows):
+        with keep_pub_date():
+            for batch in batched(rows, self.batch_size):
+                with transaction.atomic():
+                    self.import_batch(batch)
+        return sum(self.created.values())
+
+    def import_batch(self, batch):
+        posts, comments, follows = [], [], []
+        for row in batch:
+            if row is None:
+                self.skipped += 1
+                continue
+            kind = row.get('type', 'post')
+            if kind == 'post':
+                posts.append(row)
+            elif kind == 'comment':
+                comments.append(row)
+            elif kind == 'follow':
+                follows.append(row)
+            else:
+                self.skipped += 1
+        self.import_posts(posts)
+        self.import_comments(comments)
+        self.import_follows(follows)
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def pub_date(self, row):
+        return parse_datetime(row.get('pub_date') or '') or timezone.now()
+
+    def import_posts(self, rows):
+        if not rows:
+            return
+        pk = self.next_id(Post)
+        posts = []
+        post_ids = {}
+        for row in rows:
+            author_id = self.user_id(row.get('author'))
+            if author_id is None or not row.get('text'):
+                self.skipped += 1
+                continue
+            group_id = self.group_id(row.get('group'))
+            posts.append(Post(
+                pk=pk,
+                author_id=author_id,
+                group_id=group_id,
+                text=row['text'],
+                pub_date=self.pub_date(row),
+                image=row.get('image') or '',
+            ))
+            if row.get('id') is not None:
+                post_ids[str(row['id'])] = pk
+            self.authors.add(author_id)
+            self.group_ids.add(group_id)
+            pk += 1
+        Post.objects.bulk_create(posts)
+        search.get_engine().index((post.pk, post.text) for post in posts)
+        self.remember_post_ids(post_ids)
+        self.created['post'] += len(posts)
+
+    def remember_post_ids(self, post_ids):
+        if not post_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {POST_IDS_TABLE} '
+                f'WHERE file_id IN ({placeholders})',
+                list(post_ids),
+            )
+            cursor.executemany(
+                f'INSERT INTO {POST_IDS_TABLE} (file_id, post_id) '
+                f'VALUES (%s, %s)',
+                list(post_ids.items()),
+            )
+
+    def find_post_ids(self, file_ids):
+        """id постов в базе по их id в файле для одной пачки."""
+        if not file_ids:
+            return {}
+        placeholders = ', '.join(['%s'] * len(file_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT file_id, post_id FROM {POST_IDS_TABLE} '
+                f'WHERE file_id IN ({placeholders})',
+                list(file_ids),
+            )
+            return dict(cursor.fetchall())
+
+    def import_comments(self, rows):
+        if not rows:
+            return
+        pk = self.next_id(Comment)
+        comments = []
+        post_ids = self.find_post_ids({
+            str(row['post']) for row in rows if row.get('post') is not None
+        })
+        for row in rows:
+            post_id = post_ids.get(str(row.get('post')))
+            author_id = self.user_id(row.get('author'))
+            if post_id is None or author_id is None or not row.get('text'):
+                self.skipped += 1
+                continue
+            comments.append(Comment(
+                pk=pk,
+                post_id=post_id,
+                author_id=author_id,
+                text=row['text'],
+                pub_date=self.pub_date(row),
+            ))
+            pk += 1
+        Comment.objects.bulk_create(comments)
+        self.created['comment'] += len(comments)
+
+    def import_follows(self, rows):
+        follows = []
+        for row in rows:
+            user_id = self.user_id(row.get('user'))
+            author_id = self.user_id(row.get('author'))
+            if user_id is None or author_id is None or user_id == author_id:
+                self.skipped += 1
+                continue
+            follows.append(Follow(user_id=user_id, author_id=author_id))
+            self.readers.add(user_id)
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        self.created['follow'] += len(follows)
+
+    @transaction.atomic
+    def finish(self):
+        """Обновляет данные, которые bulk_create обходит стороной."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [Post, Comment]
+            ):
+                cursor.execute(sql)
+        counters.recount()
+        readers = Feed.objects.filter(user__in=self.readers).values_list(
+            'user', flat=True
+        ).union(Feed.objects.filter(
+            user__follower__author__in=self.authors
+        ).values_list('user', flat=True))
+        for user in User.objects.filter(pk__in=list(readers)).iterator():
+            feed.build_feed(user)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {POST_IDS_TABLE}')
+        page_cache.bump_generation()
+        stamps.touch(
+            stamps.scope('all'),
+            *(stamps.scope('author', pk) for pk in self.authors),
+            *(stamps.scope('group', pk) for pk in self.group_ids if pk),
+            *(stamps.scope('follow', pk) for pk in self.readers),
+        )
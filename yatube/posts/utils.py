@@ -1,9 +1,272 @@
+import hashlib
+import time
+
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import DatabaseError, connection
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import SimpleLazyObject, cached_property
+
+from core import metrics
+
+from . import page_cache
+
+CURSOR_SALT = 'posts.cursor'
+COMMENT_ORDERS = ('oldest', 'newest')
+
+
+def encode_cursor(obj, backwards=False):
+    """Упаковывает позицию (pub_date, id) в непрозрачный токен."""
+    return signing.dumps(
+        [obj.pub_date.isoformat(), obj.pk, backwards], salt=CURSOR_SALT
+    )
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора. Для битого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        pub_date, pk, backwards = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    pub_date = parse_datetime(pub_date)
+    if pub_date is None:
+        return None
+    return pub_date, pk, bool(backwards)
+
+
+class CursorPage(Page):
+    """Страница курсорной пагинации.
+
+    Номера страниц не известны, вместо них переходы идут по токенам
+    next_cursor и previous_cursor.
+    """
+    is_cursor = True
+
+    def __init__(
+        self, object_list, paginator, next_cursor=None, previous_cursor=None
+    ):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def next_page_number(self):
+        return self.next_cursor
+
+    def previous_page_number(self):
+        return self.previous_cursor
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (pub_date, id) без OFFSET и COUNT(*).
+
+    Следующая страница выбирается условием «строго после последней
+    записи», поэтому новые записи не сдвигают уже открытые страницы.
+    """
+
+    def __init__(self, object_list, per_page, descending=True):
+        super().__init__(object_list, per_page)
+        self.descending = descending
 
+    def get_cursor_page(self, cursor=None, restart=True):
+        """Страница после курсора.
 
-def get_page_obj(queryset, request):
-    paginator = Paginator(queryset, settings.NUM_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        Если после курсора записей нет, при restart=True отдаётся
+        первая страница, иначе пустая.
+        """
+        position = decode_cursor(cursor)
+        backwards = bool(position) and position[2]
+        descending = self.descending != backwards
+        prefix = '-' if descending else ''
+        queryset = self.object_list.order_by(
+            f'{prefix}pub_date', f'{prefix}pk'
+        )
+        if position:
+            pub_date, pk, _ = position
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'pub_date__{lookup}': pub_date})
+                | Q(pub_date=pub_date, **{f'pk__{lookup}': pk})
+            )
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if not items:
+            if position and restart:
+                return self.get_cursor_page()
+            return CursorPage(items, self)
+        if backwards:
+            items.reverse()
+            next_cursor = encode_cursor(items[-1])
+            previous_cursor = (
+                encode_cursor(items[0], backwards=True) if has_more else None
+            )
+        else:
+            next_cursor = encode_cursor(items[-1]) if has_more else None
+            previous_cursor = (
+                encode_cursor(items[0], backwards=True) if position else None
+            )
+        return CursorPage(items, self, next_cursor, previous_cursor)
+
+
+def estimate_count(queryset):
+    """Число строк таблицы по статистике ANALYZE в sqlite_stat1.
+
+    Годится только для выборки всей таблицы без фильтров; для других
+    запросов, других баз и таблиц без статистики возвращает None.
+    """
+    if (
+        connection.vendor != 'sqlite'
+        or not isinstance(queryset, QuerySet)
+        or queryset.query.where
+        or queryset.query.distinct
+    ):
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    return int(row[0].split()[0])
+
+
+class WindowedPaginator(Paginator):
+    """Пагинатор по номерам страниц для больших лент.
+
+    Шаблону отдаётся только окно page.window из PAGINATOR_WINDOW
+    страниц по обе стороны от текущей. Число записей берётся из count,
+    если его передали, иначе из кэша: при промахе — из sqlite_stat1
+    для таблиц от PAGINATOR_ESTIMATE_ROWS строк и COUNT(*) для
+    остальных. Ключ кэша включает поколение лент и count_key, поэтому
+    новые посты сразу меняют число.
+    """
+
+    def __init__(self, object_list, per_page, count=None, count_key=''):
+        super().__init__(object_list, per_page)
+        if count is not None:
+            self.count = count
+        self.count_key = count_key
+
+    def count_cache_key(self):
+        if isinstance(self.object_list, QuerySet):
+            source = str(self.object_list.query)
+        elif self.count_key:
+            source = type(self.object_list).__name__
+        else:
+            return None
+        digest = hashlib.md5(
+            f'{source}|{self.count_key}'.encode()
+        ).hexdigest()
+        return f'paginator_count:{page_cache.generation()}:{digest}'
+
+    def count_rows(self):
+        estimate = estimate_count(self.object_list)
+        if (
+            estimate is not None
+            and estimate >= settings.PAGINATOR_ESTIMATE_ROWS
+        ):
+            return estimate
+        return self.object_list.count()
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'count'):
+            return len(self.object_list)
+        key = self.count_cache_key()
+        if key is None:
+            return self.object_list.count()
+        count = cache.get(key)
+        if count is None:
+            count = self.count_rows()
+            cache.set(key, count, settings.PAGINATOR_COUNT_TIMEOUT)
+        return count
+
+    def window(self, number):
+        """Номера страниц вокруг number."""
+        size = settings.PAGINATOR_WINDOW
+        return range(
+            max(1, number - size), min(self.num_pages, number + size) + 1
+        )
+
+    def page(self, number):
+        page = super().page(number)
+        page.window = self.window(page.number)
+        return page
+
+
+def get_page_obj(queryset, request, cursor=False, count=None, count_key=''):
+    """Возвращает страницу постов.
+
+    При cursor=True используется курсорная пагинация по ?cursor=,
+    старые ссылки вида ?page=N продолжают работать через OFFSET.
+    Известное заранее число записей count избавляет от COUNT(*),
+    иначе оно кэшируется с учётом count_key (см. WindowedPaginator).
+    """
+    started = time.perf_counter()
+    if cursor and 'page' not in request.GET:
+        paginator = CursorPaginator(queryset, settings.NUM_PAGE)
+        page_obj = paginator.get_cursor_page(request.GET.get('cursor'))
+        kind = 'cursor'
+    else:
+        paginator = WindowedPaginator(
+            queryset, settings.NUM_PAGE, count, count_key
+        )
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+        len(page_obj)
+        kind = 'offset'
+    metrics.observe(
+        'yatube_paginator_seconds', time.perf_counter() - started, kind=kind
+    )
     return page_obj
+
+
+def get_lazy_page_obj(*args, **kwargs):
+    """Страница постов, которая выбирается из базы при первом обращении.
+
+    Если блок ленты отдаётся из кэша, запросов к постам не будет.
+    """
+    return SimpleLazyObject(lambda: get_page_obj(*args, **kwargs))
+
+
+def get_comments_page(post, request, restart=True):
+    """Страница комментариев поста по ?cursor= в порядке ?order=.
+
+    Комментарии выбираются по курсору порциями по NUM_COMMENTS,
+    поэтому время ответа не зависит от их общего числа.
+    """
+    order = request.GET.get('order')
+    if order not in COMMENT_ORDERS:
+        order = COMMENT_ORDERS[0]
+    paginator = CursorPaginator(
+        post.comments.select_related('author').order_by('pub_date', 'pk'),
+        settings.NUM_COMMENTS,
+        descending=order == 'newest',
+    )
+    started = time.perf_counter()
+    page = paginator.get_cursor_page(request.GET.get('cursor'), restart)
+    metrics.observe(
+        'yatube_paginator_seconds', time.perf_counter() - started,
+        kind='comments',
+    )
+    page.order = order
+    return page
@@ -1,34 +1,88 @@
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.http import urlencode
 
+from core.decorators import conditional
+
+from . import counters, stamps
+from .feed import get_feed_posts
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
-from .utils import get_page_obj
+from .search import search_posts
+from .serializers import serialize_comment
+from .utils import get_comments_page, get_lazy_page_obj, get_page_obj
+
+
+def page_validators(request, *scopes, extra=()):
+    """ETag и Last-Modified HTML-страницы ленты.
+
+    Кроме меток лент учитываются путь и пользователь: шапка и кнопка
+    подписки у каждого свои, а его подписки отмечены меткой follow.
+    """
+    user = request.user
+    if user.is_authenticated:
+        scopes += (stamps.scope('follow', user.pk),)
+    return stamps.validators(
+        *scopes,
+        extra=[request.get_full_path(), user.pk, user.get_username(), *extra],
+    )
+
+
+def index_validators(request):
+    return page_validators(request, stamps.scope('all'))
+
+
+def group_validators(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return page_validators(
+        request, stamps.scope('group', group.pk), extra=[group.posts_count]
+    )
 
 
-@cache_page(20, key_prefix='index_page')
+def profile_validators(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
+    return page_validators(
+        request,
+        stamps.scope('author', author.pk),
+        extra=[counters.user_counters(author).posts_count],
+    )
+
+
+@conditional(index_validators)
 def index(request):
     post_list = Post.objects.select_related('group', 'author')
     return render(
         request,
         'posts/index.html',
-        {'page_obj': get_page_obj(post_list, request), }
+        {'page_obj': get_lazy_page_obj(post_list, request, cursor=True), }
     )
 
 
+@conditional(group_validators)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author')
     return render(
         request,
         'posts/group_list.html',
-        {'group': group, 'page_obj': get_page_obj(posts, request), }
+        {
+            'group': group,
+            'page_obj': get_lazy_page_obj(
+                posts, request, cursor=True, count=group.posts_count
+            ),
+        }
     )
 
 
+@conditional(profile_validators)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
     userposts = author.posts.select_related('group')
     following = (
         request.user != username and request.user.is_authenticated
@@ -39,23 +93,44 @@ def profile(request, username):
         'posts/profile.html',
         {
             'author': author,
-            'page_obj': get_page_obj(userposts, request),
+            'page_obj': get_lazy_page_obj(
+                userposts,
+                request,
+                cursor=True,
+                count=counters.user_counters(author).posts_count,
+            ),
             'following': following,
         }
     )
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__counters', 'group'), pk=post_id
+    )
+    counters.user_counters(post.author)
     form = CommentForm(request.POST or None, )
-    comments = post.comments.select_related('author')
     return render(
         request,
         'posts/post_detail.html',
-        {'form': form, 'post': post, 'comments': comments}
+        {
+            'form': form,
+            'post': post,
+            'comments': get_comments_page(post, request),
+        }
     )
 
 
+def post_comments(request, post_id):
+    """Следующая порция комментариев поста в JSON для «Показать ещё»."""
+    post = get_object_or_404(Post, pk=post_id)
+    page = get_comments_page(post, request, restart=False)
+    return JsonResponse({
+        'comments': [serialize_comment(comment) for comment in page],
+        'next_cursor': page.next_cursor,
+    })
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -65,7 +140,8 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        with transaction.atomic():
+            post.save()
         return redirect('posts:profile', username=request.user.username)
     return render(request, 'posts/create_post.html', {'form': form, })
 
@@ -73,7 +149,7 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    if request.user != post.author:
+    if post.author_id != request.user.pk:
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(
         request.POST or None,
@@ -81,7 +157,8 @@ def post_edit(request, post_id):
         instance=post,
     )
     if form.is_valid():
-        form.save()
+        with transaction.atomic():
+            form.save()
         return redirect('posts:post_detail', post_id=post_id)
     return render(
         request,
@@ -98,19 +175,38 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    return render(
+        request,
+        'posts/search.html',
+        {
+            'query': query,
+            'page_query': urlencode({'q': query}) + '&',
+            'page_obj': get_page_obj(search_posts(query), request),
+        }
+    )
+
+
 @login_required
 def follow_index(request):
-    posts_following_authors = Post.objects.filter(
-        author__following__user=request.user
+    posts_following_authors = get_feed_posts(request.user)
+    follow_stamp, _ = stamps.validators(
+        stamps.scope('follow', request.user.pk)
     )
     return render(
         request,
         'posts/follow.html',
-        {'page_obj': get_page_obj(posts_following_authors, request)},
+        {
+            'page_obj': get_page_obj(
+                posts_following_authors, request, count_key=follow_stamp
+            ),
+        },
     )
 
 
@@ -118,7 +214,8 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(author=author, user=request.user)
+        with transaction.atomic():
+            Follow.objects.get_or_create(author=author, user=request.user)
         return redirect('posts:profile', username=username)
     return redirect('posts:profile', username=username)
 
@@ -126,7 +223,8 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(
-        author=author, user=request.user
-    ).delete()
+    with transaction.atomic():
+        Follow.objects.filter(
+            author=author, user=request.user
+        ).delete()
     return redirect('posts:profile', username=username)
@@ -42,6 +42,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.RateLimitMiddleware',
+    'core.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -72,11 +76,53 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
 
+# Очередь задач core.tasks: задачи выполняет команда run_workers.
+# TASK_QUEUE_EAGER=1 выполняет их сразу в запросе — для отладки
+# без отдельных воркеров.
+TASK_QUEUE_EAGER = os.environ.get('TASK_QUEUE_EAGER', '') == '1'
+TASK_LEASE_SECONDS = 60 * 5
+TASK_RETRY_BACKOFF = 10
+TASK_RETRY_BACKOFF_MAX = 60 * 60
+
+# Реплика для чтения GET-страниц из REPLICA_VIEWS (core.db_router).
+# Включается переменной DATABASE_REPLICA_NAME; реплику нужно держать
+# в актуальном виде, локально — командой replicate_db.
+REPLICA_DATABASE = 'replica'
+if os.environ.get('DATABASE_REPLICA_NAME'):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DATABASE_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+REPLICA_VIEWS = (
+    'posts:index',
+    'posts:group_posts',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+)
+# Сколько секунд после записи читать свои данные из основной базы.
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'replica_pin'
+
+# PRAGMA для каждого нового соединения SQLite (core.backends.sqlite3)
+# и BEGIN IMMEDIATE вместо BEGIN для transaction.atomic.
+SQLITE_IMMEDIATE_TRANSACTIONS = True
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'memory',
+    'busy_timeout': 10000,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -124,18 +170,91 @@ LOGIN_REDIRECT_URL = 'posts:index'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+TASK_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 NUM_PAGE = 10
 NUM_PAGE2 = 3
+NUM_COMMENTS = 20
 NUM_LETTER = 15
+# Сколько номеров страниц показывать по обе стороны от текущей.
+PAGINATOR_WINDOW = 3
+PAGINATOR_COUNT_TIMEOUT = 60 * 5
+# С какого числа строк в sqlite_stat1 верить оценке вместо COUNT(*).
+PAGINATOR_ESTIMATE_ROWS = 100000
+FEED_BATCH_SIZE = 500
+FEED_CELEBRITY_FOLLOWERS = 1000
+POST_CARD_CACHE_VERSION = 1
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+PAGE_CACHE_TIMEOUT = 60 * 5
+POST_THUMBNAIL_SIZE = (960, 339)
+POST_THUMBNAIL_QUALITY = 85
+POST_IMAGE_MAX_SIZE = (1920, 1920)
+POST_IMAGE_FORMAT = 'WEBP'
+POST_IMAGE_QUALITY = 82
+POST_IMAGE_REUSE_GRACE = 60 * 10
+SEARCH_ENGINE = 'auto'
+# Замеры запросов: для всех при PROFILING_ENABLED, иначе по заголовку
+# X-Profile (в DEBUG или от сотрудника).
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '') == '1'
+PROFILING_LOG_SIZE = 200
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DUMP_DIR = os.path.join(BASE_DIR, 'profiles')
+# Метрики Prometheus на /metrics/; каждый процесс пишет свои цифры
+# в METRICS_DIR, страница складывает файлы всех процессов.
+METRICS_ENABLED = True
+METRICS_DIR = os.environ.get(
+    'METRICS_DIR', os.path.join(BASE_DIR, 'metrics')
+)
+METRICS_FLUSH_INTERVAL = 5
+METRICS_NAMESPACES = ('posts', 'users', 'about')
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
 
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+CACHE_DIR = os.path.join(BASE_DIR, 'django_cache')
+
+# Тесты получают свои временные каталоги для кэшей и метрик.
+TEST_RUNNER = 'core.runner.IsolatedDirsRunner'
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+        },
+    },
+    'shared': {
+        'BACKEND': 'core.cache_backends.LockedFileBasedCache',
+        'LOCATION': CACHE_DIR,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Счётчики core.ratelimit: нужны атомарные add и incr между
+    # процессами; в бою сюда подойдёт memcached или Redis.
+    'ratelimit': {
+        'BACKEND': 'core.cache_backends.LockedFileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'ratelimit'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Ограничение частоты запросов: view → (лимит, методы). Лимит «N/s»,
+# «N/m», «N/h» или «N/d» на пользователя, для анонимных — на IP.
+RATELIMIT_ENABLED = True
+RATELIMIT_CACHE = 'ratelimit'
+RATELIMITS = {
+    'posts:post_create': ('10/m', ('POST',)),
+    'posts:add_comment': ('20/m', ('POST',)),
+    'posts:profile_follow': ('30/m', ('GET', 'POST')),
+    'posts:profile_unfollow': ('30/m', ('GET', 'POST')),
+    'users:signup': ('5/h', ('POST',)),
 }